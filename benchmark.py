@@ -0,0 +1,361 @@
+import os
+import sys
+import json
+import time
+import zlib
+import math
+import random
+import shutil
+import argparse
+import platform
+import resource
+import tempfile
+import subprocess
+import tracemalloc
+from itertools import accumulate
+from contextlib import contextmanager
+import metrics
+from journal import atomic_write_json
+from stub_llm import StubLLM
+
+# Modules that import ollama are imported inside run_size, once OLLAMA_HOST points at the LLM under test.
+
+SYLLABLES = ["ka", "lo", "mi", "ne", "su", "ta", "ri", "po", "de", "va", "chi", "om", "bre"]
+VOCABULARY = [a + b + c for a in SYLLABLES for b in SYLLABLES for c in SYLLABLES]
+# Zipf-like word frequencies, so keyword search sees realistic posting-list lengths.
+CUMULATIVE_WEIGHTS = list(accumulate(1.0 / (rank + 1) for rank in range(len(VOCABULARY))))
+
+
+def synthetic_text(rng, min_words=12, max_words=40):
+    words = rng.choices(VOCABULARY, cum_weights=CUMULATIVE_WEIGHTS, k=rng.randint(min_words, max_words))
+    return " ".join(words)
+
+
+class HashEmbedding:
+    """Deterministic bag-of-words feature hashing, so runs don't depend on downloading an embedding model."""
+
+    def __init__(self, dim=64):
+        self.dim = dim
+
+    def __call__(self, texts):
+        vectors = []
+        for text in texts:
+            vector = [0.0] * self.dim
+            for word in text.lower().split():
+                vector[zlib.crc32(word.encode("utf-8")) % self.dim] += 1.0
+            norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+            vectors.append([x / norm for x in vector])
+        return vectors
+
+
+def latency_summary(samples):
+    histogram = metrics.Histogram(reservoir_size=max(len(samples), 1))
+    for value in samples:
+        histogram.observe(value)
+    summary = histogram.summary()
+    summary["mean"] = summary["sum"] / summary["count"] if summary["count"] else 0.0
+    return summary
+
+
+class MemoryProfile:
+    """Resident set size (and, with tracemalloc, Python heap) after each benchmark phase."""
+
+    def __init__(self, trace=False):
+        self.trace = trace
+        self.phases = {}
+        if trace:
+            tracemalloc.start()
+
+    @staticmethod
+    def _rss_mb():
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+        except (OSError, ValueError):
+            return None
+
+    def mark(self, phase):
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        entry = {
+            "rss_mb": self._rss_mb(),
+            # ru_maxrss is in kilobytes on Linux and bytes on macOS
+            "max_rss_mb": usage / 2 ** 20 if sys.platform == "darwin" else usage / 2 ** 10,
+        }
+        if self.trace:
+            current, peak = tracemalloc.get_traced_memory()
+            entry["traced_mb"] = current / 2 ** 20
+            entry["traced_peak_mb"] = peak / 2 ** 20
+            tracemalloc.reset_peak()
+        self.phases[phase] = entry
+
+    def report(self, top=10):
+        report = {"phases": self.phases}
+        if self.trace:
+            statistics = tracemalloc.take_snapshot().statistics("lineno")[:top]
+            report["top_allocations"] = [
+                {"location": str(stat.traceback[0]), "size_mb": stat.size / 2 ** 20, "count": stat.count}
+                for stat in statistics
+            ]
+            tracemalloc.stop()
+        return report
+
+
+@contextmanager
+def working_directory(path):
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+def open_manager(args):
+    import chromadb
+    from embeddings import EmbeddingCache
+    from memory_manager import EONMemoryManager
+    embedder = EmbeddingCache("store/embedding_cache.sqlite3", embedding_function=HashEmbedding(args.dim))
+    manager = EONMemoryManager(
+        db_path="store/eon_memory.json", token_limit=10 ** 12,
+        # Absolute, because Chroma caches clients by path string and every size uses its own directory.
+        chroma_client=chromadb.PersistentClient(path=os.path.abspath("store/chroma")), embedder=embedder,
+        summary_file="store/conversation_summary.json",
+    )
+    return manager
+
+
+def bench_add(manager, size, rng, args):
+    batch_latencies = []
+    start = time.perf_counter()
+    for offset in range(0, size, args.batch_size):
+        count = min(args.batch_size, size - offset)
+        texts = [synthetic_text(rng) for _ in range(count)]
+        ids = [f"bench_{offset + i}" for i in range(count)]
+        batch_start = time.perf_counter()
+        manager.add_memories(texts, ids)
+        batch_latencies.append(time.perf_counter() - batch_start)
+    seed_seconds = time.perf_counter() - start
+
+    single_latencies = []
+    for i in range(args.samples):
+        text = synthetic_text(rng)
+        single_start = time.perf_counter()
+        manager.add_memory(text, f"bench_single_{i}")
+        single_latencies.append(time.perf_counter() - single_start)
+    return {
+        "seed_seconds": seed_seconds,
+        "docs_per_sec": size / seed_seconds if seed_seconds else 0.0,
+        "batch": latency_summary(batch_latencies),
+        "single": latency_summary(single_latencies),
+    }
+
+
+def bench_retrieve(manager, rng, args):
+    latencies = []
+    for _ in range(args.samples):
+        query = synthetic_text(rng, 3, 8)
+        start = time.perf_counter()
+        manager.search_memory(query, top_k=args.top_k)
+        latencies.append(time.perf_counter() - start)
+    result = latency_summary(latencies)
+    result["queries_per_sec"] = len(latencies) / result["sum"] if result["sum"] else 0.0
+    return result
+
+
+def bench_summarize(manager, stub, args):
+    with manager.lock:
+        documents = list(manager.documents.values())[:args.summarize_docs]
+    requests_before = stub.requests if stub is not None else None
+    start = time.perf_counter()
+    manager.summarize_memory(documents)
+    result = {"documents": len(documents), "seconds": time.perf_counter() - start}
+    if stub is not None:
+        result["llm_requests"] = stub.requests - requests_before
+    return result
+
+
+def bench_startup(args):
+    start = time.perf_counter()
+    manager = open_manager(args)
+    return manager, {"seconds": time.perf_counter() - start, "documents": len(manager.documents)}
+
+
+def bench_turns(manager, rng, args):
+    """End-to-end turns wired the way ``eon.main`` wires them."""
+    from engine import TurnEngine
+    from personality import Personality
+    from response_cache import ResponseCache
+    personality = Personality(personality_file="store/traits.json")
+    response_cache = ResponseCache(path="store/response_cache.json", embedder=manager.embedder)
+    engine = TurnEngine(manager, personality=personality, response_cache=response_cache)
+    first_token, total, errors = [], [], 0
+    try:
+        for i in range(args.turns):
+            user_input = f"question {i}: {synthetic_text(rng, 5, 15)}"
+            start = time.perf_counter()
+            first_at = None
+            turn = engine.new_turn(user_input)
+            for _ in engine.stream(turn):
+                if first_at is None:
+                    first_at = time.perf_counter()
+            total.append(time.perf_counter() - start)
+            if first_at is not None:
+                first_token.append(first_at - start)
+            if turn.error is not None:
+                errors += 1
+        flush_start = time.perf_counter()
+        engine.flush()
+        flush_seconds = time.perf_counter() - flush_start
+    finally:
+        engine.close()
+        response_cache.close()
+    return {
+        "turns": args.turns,
+        "errors": errors,
+        "first_token": latency_summary(first_token),
+        "total": latency_summary(total),
+        "flush_seconds": flush_seconds,
+    }
+
+
+def run_size(size, args, stub, workdir):
+    size_dir = os.path.join(workdir, f"n{size}")
+    os.makedirs(os.path.join(size_dir, "adaptive_memory"), exist_ok=True)
+    rng = random.Random(args.seed)
+    profile = MemoryProfile(trace=args.tracemalloc)
+    metrics.metrics.reset()
+    result = {"documents": size}
+    with working_directory(size_dir):
+        profile.mark("start")
+        manager = open_manager(args)
+        result["add"] = bench_add(manager, size, rng, args)
+        profile.mark("add")
+        result["retrieve"] = bench_retrieve(manager, rng, args)
+        profile.mark("retrieve")
+        result["summarize"] = bench_summarize(manager, stub, args)
+        profile.mark("summarize")
+        manager.close()
+        manager.embedder.close()
+        manager, result["startup"] = bench_startup(args)
+        profile.mark("startup")
+        try:
+            result["turn"] = bench_turns(manager, rng, args)
+            profile.mark("turn")
+        finally:
+            manager.close()
+            manager.embedder.close()
+    result["stages"] = metrics.metrics.snapshot()
+    result["memory"] = profile.report()
+    return result
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+HEADLINE = [
+    ("add docs/s", ("add", "docs_per_sec"), True),
+    ("retrieve p50", ("retrieve", "p50"), False),
+    ("retrieve p95", ("retrieve", "p95"), False),
+    ("startup s", ("startup", "seconds"), False),
+    ("summarize s", ("summarize", "seconds"), False),
+    ("turn first token p50", ("turn", "first_token", "p50"), False),
+    ("turn total p50", ("turn", "total", "p50"), False),
+]
+
+
+def _lookup(result, path):
+    for key in path:
+        if not isinstance(result, dict) or key not in result:
+            return None
+        result = result[key]
+    return result
+
+
+def print_results(results, baseline=None):
+    previous = {run["documents"]: run for run in baseline["runs"]} if baseline else {}
+    for run in results["runs"]:
+        print(f"== {run['documents']} documents ==")
+        for label, path, higher_is_better in HEADLINE:
+            value = _lookup(run, path)
+            if value is None:
+                continue
+            line = f"  {label:<22} {value:12.4f}"
+            old = _lookup(previous.get(run["documents"]), path)
+            if old:
+                change = (value - old) / old * 100
+                better = change > 0 if higher_is_better else change < 0
+                line += f"   {change:+7.1f}% vs baseline ({'better' if better else 'worse'})"
+            print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark EONMemoryManager and the turn loop against a stub LLM.")
+    parser.add_argument("--sizes", default="1000,10000", help="comma-separated store sizes, up to 1000000")
+    parser.add_argument("--samples", type=int, default=100, help="timed single adds and queries per size")
+    parser.add_argument("--turns", type=int, default=20, help="end-to-end turns per size")
+    parser.add_argument("--batch-size", type=int, default=512)
+    parser.add_argument("--top-k", type=int, default=3)
+    parser.add_argument("--summarize-docs", type=int, default=200, help="documents fed to one summarization")
+    parser.add_argument("--dim", type=int, default=64, help="embedding dimensions")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--first-token-latency", type=float, default=0.05)
+    parser.add_argument("--token-latency", type=float, default=0.005)
+    parser.add_argument("--reply-tokens", type=int, default=32)
+    parser.add_argument("--llm-host", default=None, help="use this ollama-compatible server instead of the built-in stub")
+    parser.add_argument("--tracemalloc", action="store_true", help="also profile the Python heap (slower)")
+    parser.add_argument("--workdir", default=None, help="where stores are created (default: a temp dir)")
+    parser.add_argument("--keep", action="store_true", help="keep the generated stores")
+    parser.add_argument("--output", default=None, help="results file (default: benchmarks/<timestamp>.json)")
+    parser.add_argument("--compare", default=None, help="earlier results file to report changes against")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    output = os.path.abspath(args.output or os.path.join("benchmarks", time.strftime("%Y%m%d-%H%M%S") + ".json"))
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)
+
+    stub = None
+    if args.llm_host:
+        os.environ["OLLAMA_HOST"] = args.llm_host
+    else:
+        stub = StubLLM(first_token_latency=args.first_token_latency, token_latency=args.token_latency,
+                       tokens=args.reply_tokens).start()
+        os.environ["OLLAMA_HOST"] = stub.url
+    if "ollama" in sys.modules:
+        print("Warning: ollama was imported before OLLAMA_HOST was set; summaries may hit the real server.")
+
+    workdir = os.path.abspath(args.workdir or tempfile.mkdtemp(prefix="eon-bench-"))
+    results = {
+        "timestamp": time.time(),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": vars(args),
+        "runs": [],
+    }
+    try:
+        for size in sizes:
+            print(f"Running {size} documents...")
+            results["runs"].append(run_size(size, args, stub, workdir))
+            atomic_write_json(output, results)
+    finally:
+        if stub is not None:
+            stub.stop()
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print_results(results, baseline)
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
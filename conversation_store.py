@@ -0,0 +1,89 @@
+import os
+import time
+import sqlite3
+import threading
+
+
+class ConversationStore:
+    """Conversation log in SQLite, read back by page so callers never load the whole history.
+
+    Uses an FTS5 index for search when the SQLite build has it, and a ``LIKE``
+    scan otherwise.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS conversations ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, user TEXT NOT NULL, eon TEXT NOT NULL, timestamp REAL NOT NULL)"
+        )
+        self.full_text = self._create_fts()
+        self._db.commit()
+
+    def _create_fts(self):
+        try:
+            self._db.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS conversations_fts "
+                "USING fts5(user, eon, content='conversations', content_rowid='id')"
+            )
+            self._db.execute(
+                "CREATE TRIGGER IF NOT EXISTS conversations_ai AFTER INSERT ON conversations BEGIN "
+                "INSERT INTO conversations_fts(rowid, user, eon) VALUES (new.id, new.user, new.eon); END"
+            )
+            return True
+        except sqlite3.OperationalError:
+            return False
+
+    def append(self, user_message, eon_response, timestamp=None):
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT INTO conversations (user, eon, timestamp) VALUES (?, ?, ?)",
+                (user_message, eon_response, timestamp if timestamp is not None else time.time()),
+            )
+            self._db.commit()
+            return cursor.lastrowid
+
+    def extend(self, entries):
+        """Bulk-insert ``{"user", "eon"}`` dicts, e.g. when migrating a JSON conversation log."""
+        now = time.time()
+        rows = [(entry.get("user", ""), entry.get("eon", ""), entry.get("timestamp", now)) for entry in entries]
+        with self._lock:
+            self._db.executemany("INSERT INTO conversations (user, eon, timestamp) VALUES (?, ?, ?)", rows)
+            self._db.commit()
+
+    def _where(self, search):
+        if not search:
+            return "", ()
+        if self.full_text:
+            quoted = '"' + search.replace('"', '""') + '"'
+            return "WHERE id IN (SELECT rowid FROM conversations_fts WHERE conversations_fts MATCH ?)", (quoted,)
+        pattern = f"%{search}%"
+        return "WHERE user LIKE ? OR eon LIKE ?", (pattern, pattern)
+
+    def count(self, search=None):
+        where, params = self._where(search)
+        with self._lock:
+            return self._db.execute(f"SELECT COUNT(*) FROM conversations {where}", params).fetchone()[0]
+
+    def page(self, page=0, page_size=10, search=None, newest_first=True):
+        """Return one page of entries as dicts with ``id``, ``user``, ``eon`` and ``timestamp``."""
+        where, params = self._where(search)
+        order = "DESC" if newest_first else "ASC"
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT id, user, eon, timestamp FROM conversations {where} ORDER BY id {order} LIMIT ? OFFSET ?",
+                params + (page_size, page * page_size),
+            ).fetchall()
+        return [{"id": row[0], "user": row[1], "eon": row[2], "timestamp": row[3]} for row in rows]
+
+    def recent(self, last_n=5):
+        """The last ``last_n`` entries in chronological order."""
+        return list(reversed(self.page(0, last_n)))
+
+    def close(self):
+        with self._lock:
+            self._db.close()
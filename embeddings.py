@@ -0,0 +1,111 @@
+import os
+import array
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+import metrics
+
+
+def content_hash(text):
+    """SHA-256 of ``text``: the embedding cache key and the ``content_hash`` metadata of stored memories."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """Content-addressed embedding store: an in-memory LRU in front of an on-disk SQLite table.
+
+    ``embed`` looks every text up by its SHA-256, and only the misses are sent to
+    the embedding function, in batches of ``batch_size``. New vectors are written
+    back to both tiers, so identical text is embedded once per deployment.
+    """
+
+    def __init__(self, path="adaptive_memory/embedding_cache.sqlite3", embedding_function=None,
+                 max_memory_entries=4096, batch_size=64):
+        self.path = path
+        self._embedding_function = embedding_function
+        self.max_memory_entries = max_memory_entries
+        self.batch_size = batch_size
+        self.memory = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS embeddings (hash TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+        self._db.commit()
+
+    @property
+    def embedding_function(self):
+        if self._embedding_function is None:
+            # The same model Chroma would use, so cached vectors match the collection's.
+            from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+            self._embedding_function = DefaultEmbeddingFunction()
+        return self._embedding_function
+
+    def _remember(self, key, vector):
+        self.memory[key] = vector
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.max_memory_entries:
+            self.memory.popitem(last=False)
+
+    def _load_from_disk(self, keys):
+        found = {}
+        keys = list(keys)
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            rows = self._db.execute(f"SELECT hash, vector FROM embeddings WHERE hash IN ({placeholders})", batch)
+            for key, blob in rows:
+                found[key] = array.array("f", blob).tolist()
+        return found
+
+    def lookup(self, texts):
+        """Return ``{hash: vector}`` for the texts already cached in either tier, without embedding the rest."""
+        keys = [content_hash(text) for text in texts]
+        vectors = {}
+        with self._lock:
+            for key in keys:
+                if key in self.memory:
+                    self.memory.move_to_end(key)
+                    vectors[key] = self.memory[key]
+            missing = {key for key in keys if key not in vectors}
+            if missing:
+                for key, vector in self._load_from_disk(missing).items():
+                    vectors[key] = vector
+                    self._remember(key, vector)
+        return vectors
+
+    def embed(self, texts):
+        keys = [content_hash(text) for text in texts]
+        vectors = self.lookup(texts)
+        to_embed = OrderedDict((key, text) for key, text in zip(keys, texts) if key not in vectors)
+        self.hits += len(keys) - len(to_embed)
+        self.misses += len(to_embed)
+        pending = list(to_embed.items())
+        for start in range(0, len(pending), self.batch_size):
+            batch = pending[start:start + self.batch_size]
+            with metrics.timer("embedding.compute"):
+                computed = self.embedding_function([text for _, text in batch])
+            self.store({key: vector for (key, _), vector in zip(batch, computed)}, vectors)
+        return [vectors[key] for key in keys]
+
+    def store(self, computed, into=None):
+        """Add ``{hash: vector}`` pairs to both tiers (and to ``into`` when given)."""
+        rows = []
+        with self._lock:
+            for key, vector in computed.items():
+                vector = [float(x) for x in vector]
+                self._remember(key, vector)
+                if into is not None:
+                    into[key] = vector
+                rows.append((key, array.array("f", vector).tobytes()))
+            self._db.executemany("INSERT OR REPLACE INTO embeddings (hash, vector) VALUES (?, ?)", rows)
+            self._db.commit()
+
+    def embed_query(self, text):
+        return self.embed([text])[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,228 @@
+import queue
+import asyncio
+import hashlib
+import threading
+import time
+import ollama
+import metrics
+from prompt_builder import PromptBuilder
+from responder import MODEL, ResponseStream
+
+_DONE = object()
+
+
+def memory_id_for(user_input):
+    return "memory_" + hashlib.sha256(user_input.encode()).hexdigest()
+
+
+class Turn:
+    """One user message and, once streamed, the reply text, timing stats and cache status."""
+
+    def __init__(self, user_input, traits=None, remember=True, memory_manager=None):
+        self.user_input = user_input
+        self.traits = traits
+        self.remember = remember
+        self.memory_manager = memory_manager
+        self.memory_ids = []
+        self.prompt_tokens = 0
+        self.text = ""
+        self.stats = {}
+        self.error = None
+        self.cached = False
+
+
+class TurnEngine:
+    """Async turn pipeline shared by the CLI and the Streamlit app.
+
+    Retrieval and trait lookup run concurrently, the reply is streamed through
+    ``responder.ResponseStream`` on ollama's async client (so concurrent turns
+    never wait on a thread for their tokens), and storing the memory, logging the exchange
+    and any summarization happen on a background worker after the last token
+    is emitted. The write queue is
+    bounded by ``max_pending_writes``: when it is full, finishing a turn waits
+    for room, so bookkeeping can fall behind but never grow without bound.
+
+    The engine owns an event loop on a daemon thread; ``astream`` can be awaited
+    from that loop's coroutines, while ``stream`` is a blocking generator for
+    callers without an event loop. A turn may carry its own memory manager
+    (e.g. one tenant's) in place of the engine's default one.
+    """
+
+    def __init__(self, memory_manager=None, personality=None, response_cache=None, model=MODEL,
+                 top_k=3, max_pending_writes=32, prompt_builder=None, close_timeout=30.0):
+        self.memory_manager = memory_manager
+        self.personality = personality
+        self.response_cache = response_cache
+        self.model = model
+        self.top_k = top_k
+        self.max_pending_writes = max_pending_writes
+        self.prompt_builder = prompt_builder or PromptBuilder()
+        self.close_timeout = close_timeout
+        # Tasks currently streaming a turn, so close() can finish or cancel them.
+        self._turns = set()
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name="eon-turn-engine", daemon=True)
+        self._thread.start()
+        self._run(self._start())
+
+    def _run(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    async def _start(self):
+        # Created on the engine's loop, which its connection pool is bound to.
+        self._client = ollama.AsyncClient()
+        self._writes = asyncio.Queue(maxsize=self.max_pending_writes)
+        self._worker = asyncio.create_task(self._write_worker())
+
+    async def _write_worker(self):
+        while True:
+            memory_manager, user_input, reply = await self._writes.get()
+            try:
+                with metrics.timer("turn.persist"):
+                    await asyncio.to_thread(memory_manager.add_memory, user_input, memory_id_for(user_input))
+                    await asyncio.to_thread(memory_manager.append_conversation, user_input, reply)
+                    await asyncio.to_thread(memory_manager.summarize_memory_if_needed)
+            except Exception as e:
+                print(f"Error persisting turn: {e}")
+            finally:
+                memory_manager.end_write()
+                self._writes.task_done()
+
+    def new_turn(self, user_input, traits=None, remember=True, memory_manager=None):
+        return Turn(user_input, traits=traits, remember=remember, memory_manager=memory_manager or self.memory_manager)
+
+    async def _context(self, turn):
+        retrieval = asyncio.to_thread(turn.memory_manager.search_memory, turn.user_input, self.top_k)
+        if turn.traits is None and self.personality is not None:
+            hits, turn.traits = await asyncio.gather(retrieval, asyncio.to_thread(self.personality.get_traits))
+        else:
+            hits = await retrieval
+        turn.memory_ids = [hit["id"] for hit in hits]
+        return hits
+
+    async def astream(self, turn):
+        """Yield reply tokens for ``turn``; persistence is queued once the reply is complete."""
+        task = asyncio.current_task()
+        self._turns.add(task)
+        try:
+            async for token in self._astream(turn):
+                yield token
+        finally:
+            self._turns.discard(task)
+
+    async def _astream(self, turn):
+        turn_start = time.perf_counter()
+        with metrics.timer("turn.retrieval"):
+            hits = await self._context(turn)
+        # The turn's own earlier ask is stored under memory_id_for(input); keying on it would make
+        # the second identical ask miss, so it is left out of the cache key.
+        own_id = memory_id_for(turn.user_input)
+        cache_ids = [memory_id for memory_id in turn.memory_ids if memory_id != own_id]
+        if self.response_cache is not None:
+            cached = await asyncio.to_thread(self.response_cache.get, turn.traits, cache_ids, turn.user_input)
+            if cached is not None:
+                turn.text, turn.cached = cached, True
+                turn.stats = {"time_to_first_token": 0.0, "tokens": 0, "tokens_per_sec": 0.0, "total_time": 0.0}
+                metrics.metrics.observe("turn.cache_hit", time.perf_counter() - turn_start)
+                yield cached
+                await self._enqueue(turn)
+                return
+        with metrics.timer("turn.prompt_build"):
+            messages, turn.prompt_tokens = self.prompt_builder.build(hits, turn.user_input, turn.traits)
+        response = ResponseStream(messages, model=self.model, client=self._client, prompt_tokens=turn.prompt_tokens)
+        tokens = response.__aiter__()
+        first_token_at = None
+        try:
+            async for token in tokens:
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                yield token
+        finally:
+            # Close the ollama stream now rather than whenever the generator is collected.
+            await tokens.aclose()
+        turn.text, turn.error, turn.stats = response.text, response.error, response.stats
+        if first_token_at is not None:
+            metrics.metrics.observe("turn.first_token", first_token_at - turn_start)
+        metrics.metrics.observe("turn.total", time.perf_counter() - turn_start)
+        if self.response_cache is not None and turn.error is None:
+            await asyncio.to_thread(self.response_cache.put, turn.traits, cache_ids, turn.user_input, turn.text)
+        await self._enqueue(turn)
+
+    async def _enqueue(self, turn):
+        if turn.remember:
+            # Counted from now, so closing the manager (e.g. a tenant reload) waits for this write.
+            turn.memory_manager.begin_write()
+            try:
+                await self._writes.put((turn.memory_manager, turn.user_input, turn.text))
+            except BaseException:
+                turn.memory_manager.end_write()
+                raise
+
+    def stream(self, turn, poll_interval=0.1):
+        """Blocking generator over ``astream`` for synchronous callers.
+
+        Returns once the turn finishes, or as soon as the engine's loop is no
+        longer running, so a closed engine never leaves the caller waiting.
+        """
+        tokens = queue.Queue()
+
+        async def pump():
+            try:
+                async for token in self.astream(turn):
+                    tokens.put(token)
+            except asyncio.CancelledError:
+                turn.error = "Error obtaining response: the turn was cancelled"
+                tokens.put(turn.error)
+                raise
+            except Exception as e:
+                turn.error = f"Error obtaining response: {e}"
+                tokens.put(turn.error)
+            finally:
+                tokens.put(_DONE)
+
+        future = asyncio.run_coroutine_threadsafe(pump(), self.loop)
+        try:
+            while True:
+                try:
+                    token = tokens.get(timeout=poll_interval)
+                except queue.Empty:
+                    if future.done() or not self.loop.is_running():
+                        if tokens.empty():
+                            if turn.error is None and not future.done():
+                                turn.error = "Error obtaining response: the turn engine was stopped"
+                                yield turn.error
+                            return
+                    continue
+                if token is _DONE:
+                    return
+                yield token
+        finally:
+            if not future.done():
+                future.cancel()
+
+    def pending_writes(self):
+        return self._writes.qsize()
+
+    def flush(self):
+        """Block until every queued memory write (and its summarization check) has finished."""
+        self._run(self._writes.join())
+
+    async def _shutdown(self):
+        turns = list(self._turns)
+        if turns:
+            _, pending = await asyncio.wait(turns, timeout=self.close_timeout)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        await self._writes.join()
+        self._worker.cancel()
+        await self._client.close()
+
+    def close(self):
+        """Let in-flight turns finish (cancelling any still running after ``close_timeout``), drain the
+        write queue, then stop the loop."""
+        if not self.loop.is_running():
+            return
+        self._run(self._shutdown())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=5)
@@ -1,56 +1,48 @@
-import hashlib
-import ollama
 from memory_manager import EONMemoryManager
 from personality import Personality
+from response_cache import ResponseCache
+from responder import format_stats
+from engine import TurnEngine
+import metrics
 
-def formulate_response(memories, user_input, personality_traits):
-    if memories:
-        combined_memory = " ".join(memories)
-        prompt = (
-            f"Personality traits: {personality_traits}\n"
-            f"Based on what I remember: {combined_memory}\n"
-            f"Now, in response to your query: {user_input}"
-        )
-    else:
-        prompt = f"Personality traits: {personality_traits}\nUser: {user_input}"
-    try:
-        response = ollama.chat(
-            model="llama3.2",
-            messages=[{"role": "user", "content": prompt}]
-        )
-        return response["message"]["content"]
-    except Exception as e:
-        return f"Error obtaining response: {e}"
+
+def print_streamed_reply(engine, user_input, remember=True):
+    turn = engine.new_turn(user_input, remember=remember)
+    print("EON: ", end="", flush=True)
+    for token in engine.stream(turn):
+        print(token, end="", flush=True)
+    print()
+    print("[cached response]" if turn.cached else f"[{format_stats(turn.stats)}]")
+    return turn.text
 
 def main():
     print("EON: Ready to assist, sir!")
+    # EON_METRICS_PORT / EON_PROFILE / EON_METRICS_JSON turn on latency reporting
+    metrics.maybe_start_from_env()
     
-    memory_manager = EONMemoryManager(db_path="memory/eon_memory.json")
+    # The same store as the Streamlit app's "default" workspace, so both front ends share one memory
+    memory_manager = EONMemoryManager(db_path="adaptive_memory/eon_memory.json")
     personality = Personality(personality_file="memory/traits.json")
+    response_cache = ResponseCache(path="memory/response_cache.json", embedder=memory_manager.embedder)
+    engine = TurnEngine(memory_manager, personality=personality, response_cache=response_cache)
 
     while True:
         user_input = input("You: ")
         if user_input.lower() in ["exit", "see ya", "bye"]:
             print("EON: Ok bro, See ya!")
+            engine.close()
+            memory_manager.close()
+            personality.close()
+            response_cache.close()
             break
         
         # If the user asks for help-related queries
         if any(keyword in user_input.lower() for keyword in ["help", "what can you do", "what can i ask"]):
-            memories = memory_manager.retrieve_memory(user_input, top_k=3)
-            traits = personality.get_traits()
-            bot_reply = formulate_response(memories, user_input, traits)
-            print("EON:", bot_reply)
+            print_streamed_reply(engine, user_input, remember=False)
             continue  # Skip normal processing after help query
         
-        memories = memory_manager.retrieve_memory(user_input, top_k=3)
-        traits = personality.get_traits()
-        bot_reply = formulate_response(memories, user_input, traits)
-        print("EON:", bot_reply)
-
-        memory_id = "memory_" + hashlib.sha256(user_input.encode()).hexdigest()
-        memory_manager.add_memory(user_input, memory_id)
-
-        memory_manager.summarize_memory_if_needed()
+        # Storing the memory and summarizing happen in the background after the reply
+        print_streamed_reply(engine, user_input)
 
 if __name__ == "__main__":
     main()
@@ -1,21 +1,456 @@
-import ollama
+import os
 import json
+import time
+import glob
+import sqlite3
+import hashlib
+import argparse
+import shutil
+import threading
+import subprocess
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from conversation_store import ConversationStore
+from journal import MemoryJournal, atomic_write_json
+from prompt_builder import SYSTEM_PROMPT
+from tokens import get_tokenizer
 
-def fine_tune_llama3_2(training_data_path="training_data.json", output_model="llama3.2-finetuned"):
+# Llama 3 chat template markers, so packed text matches what llama3.2 sees at inference time.
+BEGIN_TEXT = "<|begin_of_text|>"
+END_TURN = "<|eot_id|>"
+
+
+def header(role):
+    return f"<|start_header_id|>{role}<|end_header_id|>\n\n"
+
+
+class Progress:
+    """Prints a running count and throughput at most every ``interval`` seconds."""
+
+    def __init__(self, label, interval=2.0):
+        self.label = label
+        self.interval = interval
+        self.count = 0
+        self.started = time.time()
+        self._last_report = self.started
+
+    def update(self, n=1):
+        self.count += n
+        now = time.time()
+        if now - self._last_report >= self.interval:
+            self._last_report = now
+            self.report()
+
+    def report(self, final=False):
+        elapsed = time.time() - self.started
+        rate = self.count / elapsed if elapsed else 0.0
+        print(f"{self.label}: {self.count} {'done' if final else 'so far'} ({rate:.1f}/s, {elapsed:.1f}s)")
+        return {"count": self.count, "seconds": elapsed, "per_sec": rate}
+
+
+class SeenHashes:
+    """On-disk set of example hashes, so deduplication memory doesn't grow with the dataset."""
+
+    def __init__(self, path, commit_every=1000):
+        self.path = path
+        self.commit_every = commit_every
+        self._pending = 0
+        if os.path.exists(path):
+            os.remove(path)
+        self._db = sqlite3.connect(path)
+        self._db.execute("CREATE TABLE seen (hash TEXT PRIMARY KEY)")
+
+    def add(self, key):
+        """Record ``key``; returns False if it was already there."""
+        cursor = self._db.execute("INSERT OR IGNORE INTO seen (hash) VALUES (?)", (key,))
+        self._pending += 1
+        if self._pending >= self.commit_every:
+            self._db.commit()
+            self._pending = 0
+        return cursor.rowcount == 1
+
+    def close(self):
+        self._db.commit()
+        self._db.close()
+        os.remove(self.path)
+
+
+class ShardWriter:
+    """Writes JSONL records into numbered shards of at most ``shard_size`` records.
+
+    Each shard is written to a temp file and renamed into place when full, so a
+    shard on disk is always complete.
     """
-    Simulate fine-tuning of Llama3.2 using Ollama's API.
-    This function loads training data and calls a (simulated) fine-tuning command.
+
+    def __init__(self, directory, prefix, shard_size=5000):
+        self.directory = directory
+        self.prefix = prefix
+        self.shard_size = shard_size
+        self.shards = []
+        self.records = 0
+        self._file = None
+        self._count = 0
+        os.makedirs(directory, exist_ok=True)
+        for stale in glob.glob(os.path.join(directory, f"{prefix}-*.jsonl")):
+            os.remove(stale)
+
+    def _path(self, index):
+        return os.path.join(self.directory, f"{self.prefix}-{index:05d}.jsonl")
+
+    def write(self, record):
+        if self._file is None:
+            self._file = open(self._path(len(self.shards)) + ".tmp", "w", encoding="utf-8")
+        self._file.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+        self._count += 1
+        self.records += 1
+        if self._count >= self.shard_size:
+            self._finish_shard()
+
+    def _finish_shard(self):
+        path = self._path(len(self.shards))
+        self._file.close()
+        os.replace(path + ".tmp", path)
+        self.shards.append({"path": path, "records": self._count})
+        self._file = None
+        self._count = 0
+
+    def close(self):
+        if self._file is not None:
+            self._finish_shard()
+        return self.shards
+
+
+def example_key(example):
+    """Dedup key: the example's content with whitespace and case normalized."""
+    parts = [m["content"] for m in example["messages"]] if "messages" in example else [example["text"]]
+    normalized = "\x1f".join(" ".join(part.lower().split()) for part in parts)
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+class StoreReader:
+    """Read-only view of a memory store for export: its snapshot, journal and conversation database.
+
+    Offers the parts of ``EONMemoryManager`` the export uses (``documents``,
+    ``metadatas``, ``lock`` and ``get_conversations``) without opening Chroma,
+    embedding anything or writing any file.
     """
+
+    def __init__(self, db_path="adaptive_memory/eon_memory.json"):
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.documents = {}
+        self.metadatas = {}
+        # A JSON conversation log not yet migrated into SQLite
+        self.legacy_conversations = []
+        self._load()
+        conversations_path = f"{os.path.splitext(db_path)[0]}_conversations.sqlite3"
+        self.conversations = ConversationStore(conversations_path) if os.path.exists(conversations_path) else None
+
+    def _load(self):
+        if os.path.exists(self.db_path):
+            with open(self.db_path, "r") as f:
+                data = json.load(f)
+            self.legacy_conversations = list(data.get("conversation_log", []))
+            if "documents" in data and "ids" in data:
+                self._apply({"op": "upsert", "ids": data["ids"], "documents": data["documents"],
+                             "metadatas": data.get("metadatas")})
+        for record in MemoryJournal(f"{self.db_path}.journal").replay():
+            self._apply(record)
+
+    def _apply(self, record):
+        op = record.get("op")
+        if op == "upsert":
+            metadatas = record.get("metadatas") or [None] * len(record["ids"])
+            for memory_id, text, metadata in zip(record["ids"], record["documents"], metadatas):
+                self.documents[memory_id] = text
+                self.metadatas[memory_id] = metadata or {}
+        elif op == "delete":
+            for memory_id in record["ids"]:
+                self.documents.pop(memory_id, None)
+                self.metadatas.pop(memory_id, None)
+        elif op == "replace":
+            self._apply({"op": "delete", "ids": record["delete_ids"]})
+            self._apply({"op": "upsert", **{k: record[k] for k in ("ids", "documents", "metadatas")}})
+        elif op == "conversation":
+            self.legacy_conversations.append(record["entry"])
+
+    def get_conversations(self, page=0, page_size=10, newest_first=True):
+        if self.conversations is not None and self.conversations.count():
+            return self.conversations.page(page, page_size, newest_first=newest_first)
+        entries = self.legacy_conversations[::-1] if newest_first else self.legacy_conversations
+        return entries[page * page_size:(page + 1) * page_size]
+
+    def close(self):
+        if self.conversations is not None:
+            self.conversations.close()
+
+
+def iter_conversation_examples(memory_manager, page_size=500, system_prompt=SYSTEM_PROMPT):
+    """Chat examples from the conversation log, read page by page, oldest first."""
+    page = 0
+    while True:
+        entries = memory_manager.get_conversations(page=page, page_size=page_size, newest_first=False)
+        if not entries:
+            return
+        for entry in entries:
+            user, reply = entry.get("user", "").strip(), entry.get("eon", "").strip()
+            # Skip turns where the model call failed; they would teach the error text.
+            if not user or not reply or reply.startswith("Error obtaining response"):
+                continue
+            yield {"messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user},
+                {"role": "assistant", "content": reply},
+            ], "source": "conversation"}
+        page += 1
+
+
+def iter_memory_examples(memory_manager):
+    """Plain-text examples from the memory store (remembered inputs, summaries, ingested transcripts)."""
+    with memory_manager.lock:
+        memory_ids = list(memory_manager.documents)
+    for memory_id in memory_ids:
+        document = memory_manager.documents.get(memory_id)
+        metadata = memory_manager.metadatas.get(memory_id) or {}
+        if document and document.strip():
+            yield {"text": document.strip(), "source": metadata.get("source", "memory")}
+
+
+def export_dataset(memory_manager, out_dir, shard_size=5000, include_memories=True):
+    """Stream conversations and memories into deduplicated JSONL shards under ``out_dir/examples``."""
+    writer = ShardWriter(os.path.join(out_dir, "examples"), "examples", shard_size)
+    seen = SeenHashes(os.path.join(out_dir, "dedup.sqlite3"))
+    progress = Progress("Exported examples")
+    duplicates = 0
+    sources = [iter_conversation_examples(memory_manager)]
+    if include_memories:
+        sources.append(iter_memory_examples(memory_manager))
+    try:
+        for source in sources:
+            for example in source:
+                if not seen.add(example_key(example)):
+                    duplicates += 1
+                    continue
+                writer.write(example)
+                progress.update()
+    finally:
+        shards = writer.close()
+        seen.close()
+    stats = progress.report(final=True)
+    print(f"Skipped {duplicates} duplicates; wrote {len(shards)} shards")
+    return {"shards": shards, "examples": writer.records, "duplicates": duplicates, "throughput": stats}
+
+
+def render_example(example):
+    if "messages" in example:
+        return "".join(f"{header(m['role'])}{m['content']}{END_TURN}" for m in example["messages"])
+    return example["text"] + END_TURN
+
+
+def _pack_shard(shard_path, out_path, max_seq_len):
+    """Worker: pack one shard's examples into sequences of at most ``max_seq_len`` tokens.
+
+    Only the sequence being filled is held in memory. With a tokenizer
+    (``EON_TOKENIZER``) sequences are written as ``input_ids``; otherwise as
+    text with whitespace token counts. Every sequence starts with
+    ``<|begin_of_text|>``, which counts towards ``max_seq_len``.
+    """
+    tokenizer = get_tokenizer()
+    bos_id = tokenizer.token_to_id(BEGIN_TEXT) if tokenizer is not None else None
+    if tokenizer is not None and bos_id is None:
+        print(f"Tokenizer has no {BEGIN_TEXT} token; packing input_ids without BOS")
+    has_bos = tokenizer is None or bos_id is not None
+    # Room left for the examples once the BOS token is accounted for
+    max_seq_len -= 1 if has_bos else 0
+    packed = examples = truncated = tokens_total = 0
+    current, current_tokens, current_examples = [], 0, 0
+
+    def encode(text):
+        """Return ``(piece, length, was_truncated)`` for one rendered example."""
+        if tokenizer is not None:
+            ids = tokenizer.encode(text, add_special_tokens=False).ids
+            return ids[:max_seq_len], min(len(ids), max_seq_len), len(ids) > max_seq_len
+        words = text.split()
+        if len(words) > max_seq_len:
+            return " ".join(words[:max_seq_len]), max_seq_len, True
+        return text, len(words), False
+
+    with open(shard_path, "r", encoding="utf-8") as src, open(out_path + ".tmp", "w", encoding="utf-8") as dst:
+        def emit():
+            nonlocal packed, tokens_total
+            if tokenizer is not None:
+                bos = [bos_id] if bos_id is not None else []
+                record = {"input_ids": bos + [i for piece in current for i in piece], "examples": current_examples}
+            else:
+                record = {"text": BEGIN_TEXT + "".join(current), "tokens": current_tokens + 1, "examples": current_examples}
+            dst.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+            packed += 1
+            tokens_total += current_tokens + (1 if has_bos else 0)
+
+        for line in src:
+            if not line.strip():
+                continue
+            piece, length, was_truncated = encode(render_example(json.loads(line)))
+            examples += 1
+            truncated += was_truncated
+            if current and current_tokens + length > max_seq_len:
+                emit()
+                current, current_tokens, current_examples = [], 0, 0
+            current.append(piece)
+            current_tokens += length
+            current_examples += 1
+        if current:
+            emit()
+    os.replace(out_path + ".tmp", out_path)
+    return {"path": out_path, "sequences": packed, "examples": examples, "truncated": truncated, "tokens": tokens_total}
+
+
+def pack_dataset(shards, out_dir, max_seq_len=2048, workers=None):
+    """Tokenize and pack every shard in parallel worker processes, one output shard per input shard."""
+    packed_dir = os.path.join(out_dir, "packed")
+    os.makedirs(packed_dir, exist_ok=True)
+    for stale in glob.glob(os.path.join(packed_dir, "packed-*.jsonl")):
+        os.remove(stale)
+    workers = workers or os.cpu_count() or 1
+    progress = Progress("Packed examples")
+    results = []
+    jobs = [
+        (shard["path"], os.path.join(packed_dir, f"packed-{index:05d}.jsonl"))
+        for index, shard in enumerate(shards)
+    ]
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_pack_shard, src, dst, max_seq_len) for src, dst in jobs]
+            for future in as_completed(futures):
+                result = future.result()
+                results.append(result)
+                progress.update(result["examples"])
+    else:
+        for src, dst in jobs:
+            result = _pack_shard(src, dst, max_seq_len)
+            results.append(result)
+            progress.update(result["examples"])
+    stats = progress.report(final=True)
+    results.sort(key=lambda result: result["path"])
+    tokens = sum(result["tokens"] for result in results)
+    print(f"Packed into {sum(result['sequences'] for result in results)} sequences, {tokens} tokens "
+          f"({tokens / stats['seconds'] if stats['seconds'] else 0:.0f} tokens/s)")
+    return {"shards": results, "max_seq_len": max_seq_len, "throughput": stats}
+
+
+def _quote(text):
+    return '"""' + text.replace('"""', '\\"\\"\\"') + '"""'
+
+
+def iter_few_shot(shards, limit):
+    count = 0
+    for shard in shards:
+        with open(shard["path"], "r", encoding="utf-8") as f:
+            for line in f:
+                if count >= limit:
+                    return
+                example = json.loads(line)
+                if "messages" in example:
+                    yield [m for m in example["messages"] if m["role"] != "system"]
+                    count += 1
+
+
+def write_modelfile(path, base_model="llama3.2", adapter=None, system_prompt=SYSTEM_PROMPT,
+                    few_shot=(), num_ctx=None):
+    """Write an ollama Modelfile: base model, optional LoRA ``ADAPTER``, system prompt and example turns."""
+    lines = [f"FROM {base_model}"]
+    if adapter:
+        lines.append(f"ADAPTER {os.path.abspath(adapter)}")
+    if num_ctx:
+        lines.append(f"PARAMETER num_ctx {num_ctx}")
+    lines.append(f"SYSTEM {_quote(system_prompt)}")
+    for messages in few_shot:
+        for message in messages:
+            lines.append(f"MESSAGE {message['role']} {_quote(message['content'])}")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    return path
+
+
+def create_model(name, modelfile_path):
+    """Register the Modelfile with the local ollama server (``ollama create``); CPU-only is fine."""
+    if shutil.which("ollama") is None:
+        print(f"ollama CLI not found; run: ollama create {name} -f {modelfile_path}")
+        return False
+    result = subprocess.run(["ollama", "create", name, "-f", modelfile_path])
+    if result.returncode != 0:
+        print(f"Error creating model {name} (exit code {result.returncode})")
+        return False
+    print(f"Created model {name}")
+    return True
+
+
+def fine_tune_llama3_2(memory_manager, out_dir="training_data", output_model="llama3.2-finetuned",
+                       base_model="llama3.2", adapter=None, shard_size=5000, max_seq_len=2048, workers=None,
+                       few_shot=8, include_memories=True, create=False):
+    """Build the training set from ``memory_manager`` and package it as an ollama model.
+
+    ``memory_manager`` may be a live ``EONMemoryManager`` or a ``StoreReader``.
+
+    ollama serves but does not train models, so the packed shards in
+    ``out_dir/packed`` are the input for a LoRA trainer that runs on CPU (e.g.
+    llama.cpp's finetune). Pass the resulting adapter as ``adapter`` to have it
+    applied via the Modelfile's ``ADAPTER`` line. Without one the model is the
+    base model plus the system prompt and ``few_shot`` example turns from the
+    exported conversations, so ``create`` (running ``ollama create``) is off by
+    default and should normally be paired with an adapter.
+    """
+    export = export_dataset(memory_manager, out_dir, shard_size=shard_size, include_memories=include_memories)
+    packed = pack_dataset(export["shards"], out_dir, max_seq_len=max_seq_len, workers=workers)
+    modelfile_path = write_modelfile(
+        os.path.join(out_dir, "Modelfile"), base_model=base_model, adapter=adapter,
+        few_shot=list(iter_few_shot(export["shards"], few_shot)), num_ctx=max_seq_len,
+    )
+    tokenizer = get_tokenizer()
+    atomic_write_json(os.path.join(out_dir, "manifest.json"), {
+        "created": time.time(),
+        "base_model": base_model,
+        "output_model": output_model,
+        "adapter": adapter,
+        "tokenizer": os.environ.get("EON_TOKENIZER") if tokenizer is not None else None,
+        "export": export,
+        "packed": packed,
+        "modelfile": modelfile_path,
+    })
+    if create:
+        if adapter is None:
+            print(f"No adapter given; {output_model} will be {base_model} with the system prompt and few-shot turns only")
+        create_model(output_model, modelfile_path)
+    return modelfile_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export EON conversations and memories as a fine-tuning dataset.")
+    parser.add_argument("--db-path", default="adaptive_memory/eon_memory.json")
+    parser.add_argument("--out-dir", default="training_data")
+    parser.add_argument("--model", default="llama3.2-finetuned", help="name for the created ollama model")
+    parser.add_argument("--base-model", default="llama3.2")
+    parser.add_argument("--adapter", default=None, help="LoRA adapter (GGUF or safetensors) to apply")
+    parser.add_argument("--shard-size", type=int, default=5000, help="examples per JSONL shard")
+    parser.add_argument("--max-seq-len", type=int, default=2048, help="tokens per packed sequence")
+    parser.add_argument("--workers", type=int, default=None, help="packing processes (default: CPU count)")
+    parser.add_argument("--few-shot", type=int, default=8, help="example turns embedded in the Modelfile")
+    parser.add_argument("--no-memories", action="store_true", help="export conversations only")
+    parser.add_argument("--create", action="store_true",
+                        help="register the Modelfile with ollama create (normally together with --adapter)")
+    args = parser.parse_args()
+
+    # Exporting only reads the store; a full EONMemoryManager would sync Chroma and write files.
+    memory_manager = StoreReader(args.db_path)
     try:
-        with open(training_data_path, "r") as f:
-            training_data = json.load(f)
-        response = ollama.chat(
-            model="llama3.2",
-            messages=[{"role": "user", "content": f"Fine-tune the model with: {json.dumps(training_data)}"}]
+        fine_tune_llama3_2(
+            memory_manager, out_dir=args.out_dir, output_model=args.model, base_model=args.base_model,
+            adapter=args.adapter, shard_size=args.shard_size, max_seq_len=args.max_seq_len,
+            workers=args.workers, few_shot=args.few_shot, include_memories=not args.no_memories,
+            create=args.create,
         )
-        print("Fine-tuning completed. New model:", output_model)
-    except Exception as e:
-        print("Error during fine-tuning:", e)
+    finally:
+        memory_manager.close()
+
 
 if __name__ == "__main__":
-    fine_tune_llama3_2()
+    main()
@@ -0,0 +1,185 @@
+import os
+import csv
+import json
+import time
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from embeddings import content_hash
+from journal import atomic_write_json
+from memory_manager import EONMemoryManager
+
+_worker_embedding_function = None
+
+
+def _init_worker():
+    global _worker_embedding_function
+    from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+    _worker_embedding_function = DefaultEmbeddingFunction()
+
+
+def _embed_batch(texts):
+    return [[float(x) for x in vector] for vector in _worker_embedding_function(texts)]
+
+
+def record_text(record, text_field="text"):
+    """Pull the transcript text out of a JSONL/CSV record, joining chat turns when there is no text field."""
+    if text_field in record and record[text_field]:
+        return str(record[text_field])
+    if "messages" in record:
+        return "\n".join(f"{m.get('role', '')}: {m.get('content', '')}" for m in record["messages"])
+    parts = [f"{key}: {record[key]}" for key in ("user", "eon") if record.get(key)]
+    return "\n".join(parts)
+
+
+def iter_records(path, text_field="text", start_line=0):
+    """Yield ``(line_number, text)`` from a JSONL or CSV file one record at a time."""
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if path.endswith(".csv"):
+            rows = csv.DictReader(f)
+        else:
+            rows = (json.loads(line) for line in f if line.strip())
+        for line_number, row in enumerate(rows, start=1):
+            if line_number <= start_line:
+                continue
+            text = record_text(row, text_field).strip()
+            if text:
+                yield line_number, text
+
+
+def chunk_text(text, max_words=256):
+    words = text.split()
+    for start in range(0, len(words), max_words):
+        yield " ".join(words[start:start + max_words])
+
+
+def iter_batches(path, memory_manager, text_field="text", batch_size=256, max_words=256, start_line=0):
+    """Group new, deduplicated chunks into batches of whole records: ``(last_line, texts, ids)``.
+
+    Chunks are addressed by content hash, so chunks already in the store and
+    repeats within a batch are skipped. Only the current batch is tracked
+    here; repeats across batches still in flight are dropped by ``ingest``
+    when it writes them.
+    """
+    texts, ids, last_line = [], [], start_line
+    batch_ids = set()
+    for line_number, text in iter_records(path, text_field, start_line):
+        for chunk in chunk_text(text, max_words):
+            memory_id = "ingest_" + content_hash(chunk)
+            if memory_id in batch_ids or memory_id in memory_manager.documents:
+                continue
+            batch_ids.add(memory_id)
+            texts.append(chunk)
+            ids.append(memory_id)
+        last_line = line_number
+        if len(texts) >= batch_size:
+            yield last_line, texts, ids
+            texts, ids = [], []
+            batch_ids.clear()
+    if texts or last_line > start_line:
+        yield last_line, texts, ids
+
+
+def load_checkpoint(checkpoint_path):
+    try:
+        with open(checkpoint_path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def ingest(path, memory_manager, text_field="text", batch_size=256, max_words=256, workers=None,
+           checkpoint_path=None, checkpoint_every=20):
+    """Stream ``path`` into ``memory_manager`` and return the number of chunks added.
+
+    Every batch is looked up in the store's ``EmbeddingCache`` first; only the
+    misses are embedded, in parallel worker processes (at most ``2 * workers``
+    batches in flight), and their vectors are added to the cache. Batches are
+    written to Chroma as they complete, in file order.
+    The store is flushed, and the checkpoint advanced, every ``checkpoint_every``
+    batches and once at the end; a rerun resumes after the last checkpointed line.
+    """
+    workers = workers or os.cpu_count() or 1
+    checkpoint_path = checkpoint_path or f"{path}.checkpoint.json"
+    start_line = load_checkpoint(checkpoint_path).get("line", 0)
+    if start_line:
+        print(f"Resuming {path} after line {start_line}")
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) if workers > 1 else None
+    in_flight = deque()
+    added = 0
+    batches_since_flush = 0
+    started = time.time()
+
+    def write(last_line, texts, ids, vectors, missing=(), computed=()):
+        nonlocal added, batches_since_flush
+        if missing:
+            memory_manager.embedder.store({content_hash(text): vector for text, vector in zip(missing, computed)}, vectors)
+        # A chunk repeated in an earlier batch that was still in flight when this one was read
+        new = [(text, memory_id) for text, memory_id in zip(texts, ids) if memory_id not in memory_manager.documents]
+        if new:
+            texts, ids = [list(column) for column in zip(*new)]
+            embeddings = [vectors[content_hash(text)] for text in texts]
+            memory_manager.add_memories(texts, ids, embeddings=embeddings, persist=False)
+            added += len(texts)
+        batches_since_flush += 1
+        if batches_since_flush >= checkpoint_every:
+            flush(last_line)
+
+    def flush(last_line):
+        nonlocal batches_since_flush
+        memory_manager.save_memory()
+        atomic_write_json(checkpoint_path, {"line": last_line, "added": added})
+        batches_since_flush = 0
+        elapsed = time.time() - started
+        print(f"Ingested {added} chunks through line {last_line} ({added / elapsed if elapsed else 0:.1f} chunks/s)")
+
+    def drain(last_line, texts, ids, vectors, missing, future):
+        write(last_line, texts, ids, vectors, missing, future.result() if future else [])
+
+    last_line = start_line
+    try:
+        for last_line, texts, ids in iter_batches(path, memory_manager, text_field, batch_size, max_words, start_line):
+            if pool is None:
+                vectors = dict(zip(map(content_hash, texts), memory_manager.embedder.embed(texts))) if texts else {}
+                write(last_line, texts, ids, vectors)
+                continue
+            vectors = memory_manager.embedder.lookup(texts) if texts else {}
+            missing = [text for text in texts if content_hash(text) not in vectors]
+            in_flight.append((last_line, texts, ids, vectors, missing, pool.submit(_embed_batch, missing) if missing else None))
+            while len(in_flight) >= 2 * workers:
+                drain(*in_flight.popleft())
+        while in_flight:
+            drain(*in_flight.popleft())
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+    flush(last_line)
+    return added
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-load JSONL/CSV transcripts into the EON memory store.")
+    parser.add_argument("paths", nargs="+", help="JSONL or CSV transcript files")
+    parser.add_argument("--db-path", default="adaptive_memory/eon_memory.json")
+    parser.add_argument("--chroma-path", default=None, help="Chroma store (default: EON_CHROMA_PATH or adaptive_memory/eon_db)")
+    parser.add_argument("--text-field", default="text")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--max-words", type=int, default=256, help="chunk size in words")
+    parser.add_argument("--workers", type=int, default=None, help="embedding processes (default: CPU count)")
+    parser.add_argument("--checkpoint-every", type=int, default=20, help="batches between flushes")
+    args = parser.parse_args()
+
+    memory_manager = EONMemoryManager(db_path=args.db_path, chroma_path=args.chroma_path)
+    try:
+        for path in args.paths:
+            added = ingest(
+                path, memory_manager, text_field=args.text_field, batch_size=args.batch_size,
+                max_words=args.max_words, workers=args.workers, checkpoint_every=args.checkpoint_every,
+            )
+            print(f"{path}: added {added} chunks")
+    finally:
+        memory_manager.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+import os
+import time
+import uuid
+import random
+import shutil
+import sqlite3
+import argparse
+import chromadb
+from embeddings import content_hash
+from memory_manager import (
+    CHROMA_BATCH_SIZE, EONMemoryManager, collection_hnsw, hnsw_metadata, hnsw_settings, resolve_chroma_path,
+)
+
+# Stores left behind by earlier versions, which hardcoded different paths.
+LEGACY_STORES = ["chroma", "eon_db", "memory/eon_db", "adaptive_memory/eon_db"]
+REBUILD_SUFFIX = ".rebuild"
+
+
+def directory_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def store_report(path):
+    """Disk usage of a Chroma store (SQLite file vs. HNSW segment files) and its collection sizes."""
+    sqlite_path = os.path.join(path, "chroma.sqlite3")
+    total = directory_size(path)
+    sqlite_bytes = os.path.getsize(sqlite_path) if os.path.exists(sqlite_path) else 0
+    client = chromadb.PersistentClient(path=path)
+    return {
+        "path": path,
+        "bytes": total,
+        "sqlite_bytes": sqlite_bytes,
+        "segment_bytes": total - sqlite_bytes,
+        "collections": {collection.name: collection.count() for collection in client.list_collections()},
+    }
+
+
+def format_report(report):
+    collections = ", ".join(f"{name}={count}" for name, count in report["collections"].items()) or "no collections"
+    return (f"{report['path']}: {report['bytes'] / 1024:.0f} KiB "
+            f"(sqlite {report['sqlite_bytes'] / 1024:.0f} KiB, segments {report['segment_bytes'] / 1024:.0f} KiB); "
+            f"{collections}")
+
+
+def iter_records(collection, batch_size=CHROMA_BATCH_SIZE):
+    """Yield ``(ids, documents, metadatas, embeddings)`` pages of a collection."""
+    offset = 0
+    while True:
+        page = collection.get(
+            offset=offset, limit=batch_size, include=["documents", "metadatas", "embeddings"]
+        )
+        if not page["ids"]:
+            return
+        embeddings = page["embeddings"]
+        yield (
+            page["ids"], page["documents"], page["metadatas"],
+            [[float(x) for x in vector] for vector in embeddings] if embeddings is not None else None,
+        )
+        offset += len(page["ids"])
+
+
+def _dimension(collection):
+    page = collection.get(limit=1, include=["embeddings"])
+    if not page["ids"] or page["embeddings"] is None:
+        return None
+    return len(page["embeddings"][0])
+
+
+def merge_stores(sources, memory_manager, batch_size=CHROMA_BATCH_SIZE, reembed=False):
+    """Copy every collection of each source store into ``memory_manager``, deduplicated by content.
+
+    Documents whose content is already in the target (or was seen earlier in the
+    merge) are skipped. An id that is taken by different content gets a hash
+    suffix. Stored vectors are reused when their dimension matches the target
+    collection; otherwise (or with ``reembed``) the documents are re-embedded.
+    Goes through ``add_memories``, so the JSON mirror, journal and keyword index
+    stay consistent with the collection. The sources are only read.
+    """
+    known = {metadata.get("content_hash") for metadata in memory_manager.metadatas.values()}
+    dimension = _dimension(memory_manager.collection)
+    results = {}
+    for source in sources:
+        stats = {"read": 0, "added": 0, "duplicates": 0, "reembedded": 0}
+        client = chromadb.PersistentClient(path=source)
+        for collection in client.list_collections():
+            for ids, documents, _, embeddings in iter_records(collection, batch_size):
+                texts, new_ids, vectors = [], [], []
+                for index, (memory_id, document) in enumerate(zip(ids, documents)):
+                    stats["read"] += 1
+                    if not document or not document.strip():
+                        continue
+                    digest = content_hash(document)
+                    if digest in known:
+                        stats["duplicates"] += 1
+                        continue
+                    known.add(digest)
+                    if memory_id in memory_manager.documents or memory_id in new_ids:
+                        memory_id = f"{memory_id}_{digest[:8]}"
+                    texts.append(document)
+                    new_ids.append(memory_id)
+                    vectors.append(embeddings[index] if embeddings is not None else None)
+                if not texts:
+                    continue
+                usable = not reembed and all(vector is not None for vector in vectors)
+                if usable and dimension is not None:
+                    usable = all(len(vector) == dimension for vector in vectors)
+                if usable:
+                    dimension = len(vectors[0])
+                    memory_manager.embedder.store({content_hash(text): vector for text, vector in zip(texts, vectors)})
+                else:
+                    stats["reembedded"] += len(texts)
+                memory_manager.add_memories(texts, new_ids, embeddings=vectors if usable else None)
+                stats["added"] += len(texts)
+        results[source] = stats
+        print(f"{source}: read {stats['read']}, added {stats['added']}, skipped {stats['duplicates']} duplicates")
+    return results
+
+
+def rebuild_collection(client, name, hnsw=None, batch_size=CHROMA_BATCH_SIZE):
+    """Copy ``name`` into a freshly built collection and swap it in under the same name.
+
+    This drops the deleted-element tombstones that delete/summarize cycles leave
+    in the HNSW index and applies new M / ef_construction values, which Chroma
+    only honours at creation. The original is deleted only after the copy is
+    complete; an interrupted swap is finished on the next run. Run it while the
+    app is stopped, since open managers hold the old collection.
+    """
+    temp_name = name + REBUILD_SUFFIX
+    names = {collection.name for collection in client.list_collections()}
+    if name not in names and temp_name in names:
+        client.get_collection(temp_name).modify(name=name)
+        return client.get_collection(name)
+    if temp_name in names:
+        client.delete_collection(temp_name)
+    old = client.get_collection(name)
+    metadata = {key: value for key, value in (old.metadata or {}).items() if not key.startswith("hnsw:")}
+    current = collection_hnsw(old)
+    settings = {
+        "M": current.get("max_neighbors"),
+        "ef_construction": current.get("ef_construction"),
+        "ef_search": current.get("ef_search"),
+    }
+    settings.update(hnsw_settings(**(hnsw or {})))
+    if current.get("space"):
+        metadata["hnsw:space"] = current["space"]
+    metadata.update(hnsw_metadata({key: value for key, value in settings.items() if value is not None}))
+    new = client.create_collection(name=temp_name, metadata=metadata or None)
+    for ids, documents, metadatas, embeddings in iter_records(old, batch_size):
+        new.add(ids=ids, documents=documents, metadatas=metadatas, embeddings=embeddings)
+    if new.count() != old.count():
+        raise RuntimeError(f"Rebuild of {name} copied {new.count()} of {old.count()} records; original kept")
+    client.delete_collection(name)
+    new.modify(name=name)
+    return client.get_collection(name)
+
+
+def vacuum_store(path):
+    """Delete HNSW segment directories no collection references any more, then VACUUM the SQLite file."""
+    db = sqlite3.connect(os.path.join(path, "chroma.sqlite3"))
+    try:
+        live = {row[0] for row in db.execute("SELECT id FROM segments")}
+        removed = []
+        for entry in os.listdir(path):
+            entry_path = os.path.join(path, entry)
+            if not os.path.isdir(entry_path) or entry in live:
+                continue
+            try:
+                uuid.UUID(entry)
+            except ValueError:
+                continue
+            shutil.rmtree(entry_path)
+            removed.append(entry)
+        db.execute("VACUUM")
+    finally:
+        db.close()
+    return removed
+
+
+def _distances(np, queries, vectors, space):
+    if space == "cosine":
+        queries = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+        vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        return 1.0 - queries @ vectors.T
+    if space == "ip":
+        return 1.0 - queries @ vectors.T
+    return (queries ** 2).sum(axis=1)[:, None] - 2 * queries @ vectors.T + (vectors ** 2).sum(axis=1)[None, :]
+
+
+def recall_report(collection, k=10, queries=100, seed=0, batch_size=4096):
+    """Recall@k of the collection's HNSW index against exact (brute-force) search.
+
+    Stored vectors are used as queries. The exact neighbours are computed by
+    streaming the collection in batches, so only ``queries x k`` candidates are
+    held at a time.
+    """
+    import numpy as np
+    total = collection.count()
+    if total == 0:
+        return {"k": k, "queries": 0, "recall": None}
+    k = min(k, total)
+    space = collection_hnsw(collection).get("space") or (collection.metadata or {}).get("hnsw:space", "l2")
+    offsets = random.Random(seed).sample(range(total), min(queries, total))
+    query_vectors = np.array(
+        [collection.get(offset=offset, limit=1, include=["embeddings"])["embeddings"][0] for offset in offsets],
+        dtype=np.float32,
+    )
+
+    start = time.perf_counter()
+    best_ids = np.empty((len(offsets), 0), dtype=object)
+    best_distances = np.empty((len(offsets), 0), dtype=np.float32)
+    for ids, _, _, embeddings in iter_records(collection, batch_size):
+        distances = _distances(np, query_vectors, np.array(embeddings, dtype=np.float32), space)
+        candidate_ids = np.concatenate([best_ids, np.tile(np.array(ids, dtype=object), (len(offsets), 1))], axis=1)
+        candidate_distances = np.concatenate([best_distances, distances], axis=1)
+        keep = np.argsort(candidate_distances, axis=1)[:, :k]
+        best_ids = np.take_along_axis(candidate_ids, keep, axis=1)
+        best_distances = np.take_along_axis(candidate_distances, keep, axis=1)
+    exact_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    ann = collection.query(query_embeddings=query_vectors.tolist(), n_results=k, include=[])
+    ann_seconds = time.perf_counter() - start
+    hits = [len(set(found) & set(expected)) / k for found, expected in zip(ann["ids"], best_ids.tolist())]
+    return {
+        "k": k,
+        "queries": len(offsets),
+        "space": space,
+        "recall": sum(hits) / len(hits),
+        "ann_seconds": ann_seconds,
+        "exact_seconds": exact_seconds,
+    }
+
+
+def compact_store(path, collection_names=None, rebuild=False, hnsw=None, recall_k=10, recall_queries=100):
+    """Optionally rebuild collections, set ef_search, vacuum, and report size and recall before and after."""
+    client = chromadb.PersistentClient(path=path)
+    settings = hnsw_settings(**(hnsw or {}))
+    names = collection_names or [collection.name for collection in client.list_collections()]
+    before = store_report(path)
+    recall_before = {name: recall_report(client.get_collection(name), recall_k, recall_queries) for name in names}
+    for name in names:
+        collection = client.get_collection(name)
+        if rebuild or "M" in settings or "ef_construction" in settings:
+            print(f"Rebuilding {name}...")
+            collection = rebuild_collection(client, name, settings)
+        elif "ef_search" in settings:
+            collection.modify(configuration={"hnsw": {"ef_search": settings["ef_search"]}})
+    removed = vacuum_store(path)
+    after = store_report(path)
+    recall_after = {name: recall_report(client.get_collection(name), recall_k, recall_queries) for name in names}
+
+    print("Before: " + format_report(before))
+    print("After:  " + format_report(after))
+    if removed:
+        print(f"Removed {len(removed)} orphaned segment directories")
+    saved = before["bytes"] - after["bytes"]
+    print(f"Reclaimed {saved / 1024:.0f} KiB ({saved / before['bytes'] * 100 if before['bytes'] else 0:.1f}%)")
+    for name in names:
+        old, new = recall_before[name], recall_after[name]
+        if new["recall"] is not None:
+            print(f"{name}: recall@{new['k']} {old['recall']:.3f} -> {new['recall']:.3f} "
+                  f"over {new['queries']} queries (HNSW {collection_hnsw(client.get_collection(name))})")
+    return {"before": before, "after": after, "removed_segments": removed,
+            "recall_before": recall_before, "recall_after": recall_after}
+
+
+def _hnsw_args(args):
+    return {"M": args.M, "ef_construction": args.ef_construction, "ef_search": args.ef_search}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect, consolidate and compact EON's Chroma stores.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    status = subparsers.add_parser("status", help="show size and contents of each store")
+    status.add_argument("paths", nargs="*", help="stores to inspect (default: the configured and legacy stores)")
+
+    merge = subparsers.add_parser("merge", help="merge other stores into the configured one, deduplicated")
+    merge.add_argument("sources", nargs="*", help="stores to merge (default: the legacy stores)")
+    merge.add_argument("--db-path", default="adaptive_memory/eon_memory.json")
+    merge.add_argument("--reembed", action="store_true", help="re-embed instead of reusing stored vectors")
+
+    for name, help_text in (("compact", "rebuild/vacuum a store and report size and recall"),
+                            ("recall", "report HNSW recall against exact search")):
+        sub = subparsers.add_parser(name, help=help_text)
+        sub.add_argument("--collection", action="append", help="collection to process (default: all)")
+        sub.add_argument("--k", type=int, default=10)
+        sub.add_argument("--queries", type=int, default=100)
+        if name == "compact":
+            sub.add_argument("--rebuild", action="store_true", help="rebuild the HNSW index from scratch")
+            sub.add_argument("--M", type=int, default=None)
+            sub.add_argument("--ef-construction", type=int, default=None)
+            sub.add_argument("--ef-search", type=int, default=None)
+
+    parser.add_argument("--chroma-path", default=None, help="target store (default: EON_CHROMA_PATH or adaptive_memory/eon_db)")
+    args = parser.parse_args()
+    target = resolve_chroma_path(args.chroma_path)
+
+    if args.command == "status":
+        for path in args.paths or [target] + [p for p in LEGACY_STORES if p != target]:
+            if os.path.isdir(path):
+                print(format_report(store_report(path)))
+    elif args.command == "merge":
+        sources = [
+            path for path in (args.sources or LEGACY_STORES)
+            if os.path.isdir(path) and os.path.abspath(path) != os.path.abspath(target)
+        ]
+        memory_manager = EONMemoryManager(db_path=args.db_path, chroma_path=target)
+        try:
+            merge_stores(sources, memory_manager, reembed=args.reembed)
+            memory_manager.save_memory()
+        finally:
+            memory_manager.close()
+        print(format_report(store_report(target)))
+        print("Sources were left in place; delete them once the merged store looks right.")
+    elif args.command == "compact":
+        compact_store(target, args.collection, rebuild=args.rebuild, hnsw=_hnsw_args(args),
+                      recall_k=args.k, recall_queries=args.queries)
+    elif args.command == "recall":
+        client = chromadb.PersistentClient(path=target)
+        for name in args.collection or [collection.name for collection in client.list_collections()]:
+            print(name, recall_report(client.get_collection(name), args.k, args.queries))
+
+
+if __name__ == "__main__":
+    main()
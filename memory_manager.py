@@ -1,97 +1,538 @@
 import os
 import json
 import time
-import requests
+import threading
+from collections import OrderedDict
 import chromadb
+import metrics
+import network
+from conversation_store import ConversationStore
+from embeddings import EmbeddingCache, content_hash
+from journal import MemoryJournal, atomic_write_json
+from lexical import InvertedIndex
 from summary import ConversationSummary
+from tokens import count_tokens
+
+CHROMA_BATCH_SIZE = 512
+DEFAULT_CHROMA_PATH = "adaptive_memory/eon_db"
+
+
+def resolve_chroma_path(path=None):
+    """The Chroma store directory: ``path``, else ``EON_CHROMA_PATH``, else the default."""
+    return path or os.environ.get("EON_CHROMA_PATH") or DEFAULT_CHROMA_PATH
+
+
+def hnsw_settings(M=None, ef_construction=None, ef_search=None):
+    """HNSW parameters from the arguments, falling back to ``EON_HNSW_M``, ``EON_HNSW_EF_CONSTRUCTION``
+    and ``EON_HNSW_EF_SEARCH``; unset ones are left to Chroma's defaults."""
+    settings = {"M": M, "ef_construction": ef_construction, "ef_search": ef_search}
+    for name in settings:
+        if settings[name] is None and os.environ.get(f"EON_HNSW_{name.upper()}"):
+            settings[name] = int(os.environ[f"EON_HNSW_{name.upper()}"])
+    return {name: value for name, value in settings.items() if value is not None}
+
+
+def hnsw_metadata(settings):
+    keys = {"M": "hnsw:M", "ef_construction": "hnsw:construction_ef", "ef_search": "hnsw:search_ef"}
+    return {keys[name]: value for name, value in settings.items()}
+
+
+def collection_hnsw(collection):
+    """The collection's effective HNSW configuration (space, ef_construction, ef_search, max_neighbors)."""
+    configuration = getattr(collection, "configuration_json", None) or {}
+    return configuration.get("hnsw") or {}
+
+
+def open_collection(client, name, hnsw=None):
+    """Get or create ``name`` with the deployment's HNSW parameters.
+
+    M and ef_construction only take effect when the collection is created (use
+    ``maintenance.py compact --rebuild`` to change them later); ef_search is
+    updated in place.
+    """
+    settings = hnsw_settings(**(hnsw or {}))
+    collection = client.get_or_create_collection(name=name, metadata=hnsw_metadata(settings) or None)
+    current = collection_hnsw(collection)
+    if "M" in settings and current.get("max_neighbors") not in (None, settings["M"]):
+        print(f"Collection {name} was built with M={current['max_neighbors']}; rebuild it to apply M={settings['M']}")
+    if "ef_search" in settings and current.get("ef_search") != settings["ef_search"]:
+        try:
+            collection.modify(configuration={"hnsw": {"ef_search": settings["ef_search"]}})
+        except Exception as e:
+            print(f"Error updating ef_search on {name}: {e}")
+    return collection
+
+
+def memory_source(memory_id):
+    """The id prefix, e.g. "memory", "news", "summary" or "ingest"."""
+    return memory_id.split("_", 1)[0] if "_" in memory_id else "memory"
+
+
+def memory_metadata(text, memory_id, timestamp=None):
+    return {
+        "content_hash": content_hash(text),
+        "tokens": count_tokens(text),
+        "source": memory_source(memory_id),
+        "timestamp": timestamp if timestamp is not None else time.time(),
+    }
+
+
+def rrf_fuse(rankings, weights, k=60):
+    """Weighted reciprocal-rank fusion of several ranked id lists into ``{id: score}``."""
+    scores = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, memory_id in enumerate(ranking):
+            scores[memory_id] = scores.get(memory_id, 0.0) + weight / (k + rank + 1)
+    return scores
+
 
 class EONMemoryManager:
-    def __init__(self, db_path="adaptive_memory/eon_memory.json", token_limit=8000):
+    def __init__(self, db_path="adaptive_memory/eon_memory.json", token_limit=8000,
+                 persistence="journal", compact_every=500, chroma_client=None, embedder=None,
+                 collection_name="EON_COLLECTION", summary_file=None, chroma_path=None, hnsw=None):
         self.db_path = db_path
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
         self.token_limit = token_limit
-        self.conversation_summary = ConversationSummary()
-        self.chroma_client = chromadb.PersistentClient(path="adaptive_memory/eon_db")
-        self.collection = self.chroma_client.get_or_create_collection(name="EON_COLLECTION")
-        self.memory = {"conversation_log": []}
+        self.compact_every = compact_every
+        if summary_file is None:
+            self.conversation_summary = ConversationSummary()
+        else:
+            self.conversation_summary = ConversationSummary(summary_file=summary_file)
+        if chroma_client is None:
+            chroma_client = chromadb.PersistentClient(path=resolve_chroma_path(chroma_path))
+        self.chroma_client = chroma_client
+        self._owns_embedder = embedder is None
+        if embedder is None:
+            embedder = EmbeddingCache(os.path.join(os.path.dirname(db_path), "embedding_cache.sqlite3"))
+        # Embeddings are computed here (and cached by content) and handed to Chroma precomputed.
+        self.embedder = embedder
+        # Guards the collection, the mirror and the JSON files when one manager is shared across sessions.
+        self.lock = threading.RLock()
+        self._summarizer = None
+        # Writes queued elsewhere (e.g. by the turn engine) that close() must wait for.
+        self._pending_writes = 0
+        self._writes_done = threading.Condition()
+        self.collection = open_collection(self.chroma_client, collection_name, hnsw)
+        # The conversation log lives in SQLite next to the JSON mirror and is read back by page.
+        self.conversations = ConversationStore(f"{os.path.splitext(db_path)[0]}_conversations.sqlite3")
+        # Entries from a pre-SQLite JSON log, migrated once on load.
+        self._legacy_conversations = []
+        # In-process mirror of the collection (id -> document / metadata), the source for snapshots.
+        self.documents = {}
+        self.metadatas = {}
+        # Running sum of the per-document "tokens" metadata, so the limit check is O(1).
+        self.total_tokens = 0
+        # Keyword index over the mirror, updated alongside it on every add/delete.
+        self.lexical = InvertedIndex()
+        # Incremented on every journaled write; lets startup skip re-syncing an up-to-date collection.
+        self.seq = 0
+        self.sync_marker_path = f"{db_path}.sync"
+        if persistence == "journal":
+            self.journal = MemoryJournal(f"{db_path}.journal")
+        elif persistence == "snapshot":
+            self.journal = None
+        else:
+            raise ValueError(f"Unknown persistence mode: {persistence}")
         self.load_memory()
 
+    @metrics.timed("memory.snapshot_write")
     def save_memory(self):
-        data = self.collection.get()
-        data["conversation_log"] = self.memory["conversation_log"]
-        with open(self.db_path, "w") as f:
-            json.dump(data, f)
+        """Write a full snapshot of the store and truncate the journal it supersedes."""
+        with self.lock:
+            data = {
+                "seq": self.seq,
+                "ids": list(self.documents),
+                "documents": list(self.documents.values()),
+                "metadatas": [self.metadatas[memory_id] for memory_id in self.documents],
+            }
+            atomic_write_json(self.db_path, data)
+            if self.journal is not None:
+                self.journal.reset()
+            self._write_sync_marker()
+
+    def compact_memory(self):
+        self.save_memory()
+
+    def _persist(self, record):
+        self.seq += 1
+        record["seq"] = self.seq
+        if self.journal is None:
+            self.save_memory()
+            return
+        self.journal.append(record)
+        if self.journal.record_count >= self.compact_every:
+            self.compact_memory()
+
+    def _apply_record(self, record):
+        op = record.get("op")
+        self.seq = max(self.seq, record.get("seq", 0))
+        if op == "upsert":
+            metadatas = record.get("metadatas") or [None] * len(record["ids"])
+            for memory_id, text, metadata in zip(record["ids"], record["documents"], metadatas):
+                self._set_document(memory_id, text, metadata)
+        elif op == "delete":
+            for memory_id in record["ids"]:
+                self._drop_document(memory_id)
+        elif op == "replace":
+            # A summary compaction: drop the summarized memories and add the summary in one step.
+            for memory_id in record["delete_ids"]:
+                self._drop_document(memory_id)
+            self._apply_record({"op": "upsert", **{k: record[k] for k in ("ids", "documents", "metadatas")}})
+        elif op == "conversation":
+            self._legacy_conversations.append(record["entry"])
+
+    def _set_document(self, memory_id, text, metadata=None):
+        self._drop_document(memory_id)
+        metadata = dict(metadata or {})
+        if "content_hash" not in metadata:
+            metadata["content_hash"] = content_hash(text)
+        if "tokens" not in metadata:
+            metadata["tokens"] = count_tokens(text)
+        metadata.setdefault("source", memory_source(memory_id))
+        self.documents[memory_id] = text
+        self.metadatas[memory_id] = metadata
+        self.total_tokens += metadata["tokens"]
+        self.lexical.add(memory_id, text)
+
+    def _drop_document(self, memory_id):
+        self.documents.pop(memory_id, None)
+        metadata = self.metadatas.pop(memory_id, None)
+        if metadata is not None:
+            self.total_tokens -= metadata.get("tokens", 0)
+        self.lexical.remove(memory_id)
 
     def load_memory(self):
+        with self.lock:
+            self._load_memory()
+
+    def _load_memory(self):
         if os.path.exists(self.db_path):
             try:
                 with open(self.db_path, "r") as f:
                     data = json.load(f)
-                if "conversation_log" in data:
-                    self.memory["conversation_log"] = data["conversation_log"]
+                self._legacy_conversations = list(data.get("conversation_log", []))
                 if "documents" in data and "ids" in data:
-                    self.collection.upsert(documents=data["documents"], ids=data["ids"])
+                    self._apply_record({
+                        "op": "upsert",
+                        "seq": data.get("seq", 0),
+                        "ids": data["ids"],
+                        "documents": data["documents"],
+                        "metadatas": data.get("metadatas"),
+                    })
             except Exception as e:
                 print(f"Error loading memory: {e}")
+        if self.journal is not None:
+            try:
+                for record in self.journal.replay():
+                    self._apply_record(record)
+            except Exception as e:
+                print(f"Error replaying memory journal: {e}")
+        if self._legacy_conversations:
+            if self.conversations.count() == 0:
+                self.conversations.extend(self._legacy_conversations)
+            self._legacy_conversations = []
+            # Rewrite the snapshot without the JSON log so it is not migrated again.
+            self.save_memory()
+        try:
+            self.sync_collection()
+        except Exception as e:
+            print(f"Error syncing memory collection: {e}")
+
+    def _read_sync_marker(self):
+        try:
+            with open(self.sync_marker_path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_sync_marker(self):
+        try:
+            atomic_write_json(self.sync_marker_path, {"seq": self.seq, "count": len(self.documents)})
+        except OSError as e:
+            print(f"Error writing sync marker: {e}")
+
+    @metrics.timed("memory.sync")
+    def sync_collection(self):
+        """Upsert only the mirrored memories that Chroma is missing or holds a stale copy of.
+
+        Chroma persists its own data, so a clean restart finds the collection already at
+        the mirror's sequence number and skips the comparison entirely. Otherwise content
+        hashes stored in metadata are compared, which reads metadata but embeds nothing;
+        entries whose content matches but whose metadata is outdated are updated in place.
+        Records written before content hashes existed are hashed from their stored
+        documents, so they are only re-embedded if the text actually changed.
+        """
+        with self.lock:
+            marker = self._read_sync_marker()
+            if marker.get("seq") == self.seq and self.collection.count() >= len(self.documents):
+                return 0
+            ids = list(self.documents)
+            stale_ids = []
+            outdated_ids = []
+            unhashed_ids = []
+            for start in range(0, len(ids), CHROMA_BATCH_SIZE):
+                batch_ids = ids[start:start + CHROMA_BATCH_SIZE]
+                existing = self.collection.get(ids=batch_ids, include=["metadatas"])
+                stored = {
+                    memory_id: metadata or {}
+                    for memory_id, metadata in zip(existing["ids"], existing["metadatas"])
+                }
+                for memory_id in batch_ids:
+                    metadata = stored.get(memory_id)
+                    if metadata is not None and "content_hash" not in metadata:
+                        unhashed_ids.append(memory_id)
+                    elif metadata is None or metadata.get("content_hash") != self.metadatas[memory_id]["content_hash"]:
+                        stale_ids.append(memory_id)
+                    elif metadata != self.metadatas[memory_id]:
+                        outdated_ids.append(memory_id)
+            for start in range(0, len(unhashed_ids), CHROMA_BATCH_SIZE):
+                batch_ids = unhashed_ids[start:start + CHROMA_BATCH_SIZE]
+                existing = self.collection.get(ids=batch_ids, include=["documents"])
+                for memory_id, document in zip(existing["ids"], existing["documents"]):
+                    if document is not None and content_hash(document) == self.metadatas[memory_id]["content_hash"]:
+                        outdated_ids.append(memory_id)  # backfills the hash along with the rest of the metadata
+                    else:
+                        stale_ids.append(memory_id)
+            for start in range(0, len(outdated_ids), CHROMA_BATCH_SIZE):
+                batch_ids = outdated_ids[start:start + CHROMA_BATCH_SIZE]
+                self.collection.update(ids=batch_ids, metadatas=[self.metadatas[memory_id] for memory_id in batch_ids])
+            for start in range(0, len(stale_ids), CHROMA_BATCH_SIZE):
+                batch_ids = stale_ids[start:start + CHROMA_BATCH_SIZE]
+                batch_documents = [self.documents[memory_id] for memory_id in batch_ids]
+                self.collection.upsert(
+                    ids=batch_ids,
+                    documents=batch_documents,
+                    metadatas=[self.metadatas[memory_id] for memory_id in batch_ids],
+                    embeddings=self.embedder.embed(batch_documents),
+                )
+            self._write_sync_marker()
+            return len(stale_ids)
+
+    def begin_write(self):
+        """Announce a write that will be applied later; pair with ``end_write``."""
+        with self._writes_done:
+            self._pending_writes += 1
+
+    def end_write(self):
+        with self._writes_done:
+            self._pending_writes -= 1
+            self._writes_done.notify_all()
+
+    def wait_for_writes(self, timeout=None):
+        with self._writes_done:
+            return self._writes_done.wait_for(lambda: self._pending_writes <= 0, timeout)
+
+    def close(self, write_timeout=30.0):
+        if not self.wait_for_writes(write_timeout):
+            print(f"Closing {self.db_path} with {self._pending_writes} queued writes still pending")
+        self.wait_for_summarization()
+        with self.lock:
+            if self.journal is not None:
+                self.journal.close()
+            self._write_sync_marker()
+            self.conversations.close()
+            self.conversation_summary.close()
+            if self._owns_embedder:
+                self.embedder.close()
 
     def add_memory(self, text, memory_id):
         try:
-            self.collection.upsert(documents=[text], ids=[memory_id])
-            self.save_memory()
+            self.add_memories([text], [memory_id])
         except Exception as e:
             print(f"Error adding memory: {e}")
 
+    @metrics.timed("memory.write")
+    def add_memories(self, texts, memory_ids, embeddings=None, batch_size=CHROMA_BATCH_SIZE, persist=True):
+        """Upsert many memories at once, embedding them in batches through the embedding cache.
+
+        ``embeddings`` may be passed precomputed (e.g. by a parallel ingest job).
+        Each batch is one Chroma upsert and one journal record; with
+        ``persist=False`` nothing is journaled and the caller is expected to
+        flush with ``save_memory()`` once it is done.
+        """
+        batch = OrderedDict()
+        for index, (memory_id, text) in enumerate(zip(memory_ids, texts)):
+            batch.pop(memory_id, None)
+            batch[memory_id] = (text, embeddings[index] if embeddings is not None else None)
+        items = list(batch.items())
+        for start in range(0, len(items), batch_size):
+            chunk = items[start:start + batch_size]
+            batch_ids = [memory_id for memory_id, _ in chunk]
+            batch_texts = [text for _, (text, _) in chunk]
+            if embeddings is not None:
+                batch_embeddings = [embedding for _, (_, embedding) in chunk]
+            else:
+                batch_embeddings = self.embedder.embed(batch_texts)
+            metadatas = [memory_metadata(text, memory_id) for memory_id, text in zip(batch_ids, batch_texts)]
+            with self.lock:
+                self.collection.upsert(
+                    ids=batch_ids, documents=batch_texts, metadatas=metadatas, embeddings=batch_embeddings
+                )
+                record = {"op": "upsert", "ids": batch_ids, "documents": batch_texts, "metadatas": metadatas}
+                self._apply_record(record)
+                if persist:
+                    self._persist(record)
+                else:
+                    self.seq += 1
+
     def append_conversation(self, user_message, eon_response):
-        self.memory["conversation_log"].append({"user": user_message, "eon": eon_response})
-        self.save_memory()
+        return self.conversations.append(user_message, eon_response)
+
+    def get_conversations(self, page=0, page_size=10, search=None, newest_first=True):
+        return self.conversations.page(page, page_size, search=search, newest_first=newest_first)
+
+    def count_conversations(self, search=None):
+        return self.conversations.count(search)
+
+    @staticmethod
+    def _metadata_filter(source=None, since=None, until=None):
+        """Build the Chroma ``where`` clause and the matching predicate for the keyword index."""
+        sources = [source] if isinstance(source, str) else source
+        clauses = []
+        if sources:
+            clauses.append({"source": {"$in": list(sources)}})
+        if since is not None:
+            clauses.append({"timestamp": {"$gte": since}})
+        if until is not None:
+            clauses.append({"timestamp": {"$lte": until}})
+        if not clauses:
+            return None, None
+        where = clauses[0] if len(clauses) == 1 else {"$and": clauses}
 
-    def retrieve_memory(self, query_text, top_k=3):
+        def matches(metadata):
+            timestamp = metadata.get("timestamp")
+            return (
+                (not sources or metadata.get("source") in sources)
+                and (since is None or (timestamp is not None and timestamp >= since))
+                and (until is None or (timestamp is not None and timestamp <= until))
+            )
+        return where, matches
+
+    def search_memory(self, query_text, top_k=3, source=None, since=None, until=None, alpha=0.5):
+        """Hybrid search returning ``{"id", "document", "score", "distance"}`` dicts, best first.
+
+        Vector hits from Chroma and BM25 keyword hits (which catch exact order
+        numbers and product codes) are combined by weighted reciprocal-rank
+        fusion; ``alpha`` is the vector weight. ``source`` (an id prefix or list
+        of them) and ``since``/``until`` (epoch seconds) filter both retrievers.
+        """
+        where, matches = self._metadata_filter(source, since, until)
+        candidate_k = max(top_k * 4, 10)
+        vector_ids, distances, documents = [], {}, {}
         try:
-            results = self.collection.query(query_texts=[query_text], n_results=top_k)
-            if results and "documents" in results and results["documents"]:
-                return results["documents"][0]
+            query_embedding = self.embedder.embed_query(query_text)
+            with self.lock, metrics.timer("memory.chroma_query"):
+                results = self.collection.query(
+                    query_embeddings=[query_embedding], n_results=candidate_k, where=where
+                )
+            if results and results.get("ids"):
+                result_distances = (results.get("distances") or [[None] * len(results["ids"][0])])[0]
+                for memory_id, document, distance in zip(results["ids"][0], results["documents"][0], result_distances):
+                    vector_ids.append(memory_id)
+                    documents[memory_id] = document
+                    distances[memory_id] = distance
         except Exception as e:
             print(f"Error retrieving memory: {e}")
-        return []
+        with self.lock, metrics.timer("memory.keyword_search"):
+            allowed = None
+            if matches is not None:
+                allowed = lambda memory_id: matches(self.metadatas.get(memory_id, {}))
+            lexical_ids = [memory_id for memory_id, _ in self.lexical.search(query_text, candidate_k, allowed)]
+            for memory_id in lexical_ids:
+                documents.setdefault(memory_id, self.documents[memory_id])
+        scores = rrf_fuse([vector_ids, lexical_ids], [alpha, 1 - alpha])
+        ranked = sorted(scores, key=scores.get, reverse=True)[:top_k]
+        return [
+            {
+                "id": memory_id,
+                "document": documents[memory_id],
+                "score": scores[memory_id],
+                "distance": distances.get(memory_id),
+            }
+            for memory_id in ranked
+        ]
+
+    def retrieve_memory(self, query_text, top_k=3, **filters):
+        return [hit["document"] for hit in self.search_memory(query_text, top_k=top_k, **filters)]
 
     def get_total_tokens(self):
-        all_docs = self.collection.get().get("documents", [])
-        total_tokens = sum(len(doc.split()) for doc in all_docs)
-        return total_tokens
+        return self.total_tokens
+
+    def summarize_memory(self, documents=None):
+        if documents is None:
+            with self.lock:
+                documents = list(self.documents.values())
+        return self.conversation_summary.summarize_documents(documents)
 
-    def summarize_memory(self):
-        all_docs = self.collection.get().get("documents", [])
-        conversation_text = "\n".join(all_docs)
-        summary = self.conversation_summary.generate_summary([conversation_text])
-        return summary
+    def summarize_memory_if_needed(self, blocking=False):
+        """Compact the store into a summary once it exceeds ``token_limit``.
 
-    def summarize_memory_if_needed(self):
+        By default the summary is generated on a background thread so the caller
+        never waits on the LLM; at most one summarization runs at a time.
+        Returns True if a summarization was started.
+        """
         total_tokens = self.get_total_tokens()
-        if total_tokens > self.token_limit:
+        if total_tokens <= self.token_limit:
+            return False
+        with self.lock:
+            if self._summarizer is not None and self._summarizer.is_alive():
+                return False
             print(f"Token limit exceeded: {total_tokens} tokens. Summarizing memories.")
-            summary = self.summarize_memory()
-            old_ids = self.collection.get().get("ids", [])
-            for mid in old_ids:
-                try:
-                    self.collection.delete(ids=[mid])
-                except Exception as e:
-                    print(f"Error deleting memory {mid}: {e}")
-            self.add_memory(summary, f"summary_{int(time.time())}")
+            if blocking:
+                self._summarizer = None
+            else:
+                self._summarizer = threading.Thread(target=self._summarize_and_compact, name="eon-summarizer", daemon=True)
+                self._summarizer.start()
+                return True
+        self._summarize_and_compact()
+        return True
+
+    def wait_for_summarization(self, timeout=None):
+        summarizer = self._summarizer
+        if summarizer is not None:
+            summarizer.join(timeout)
+
+    @metrics.timed("memory.summarize")
+    def _summarize_and_compact(self):
+        try:
+            with self.lock:
+                old_ids = list(self.documents)
+                documents = [self.documents[memory_id] for memory_id in old_ids]
+            # The LLM call runs without the lock; memories added meanwhile are kept.
+            summary = self.summarize_memory(documents)
+            self._replace_with_summary(old_ids, summary, f"summary_{int(time.time())}")
             print("Memory summarized and updated.")
+        except Exception as e:
+            print(f"Error summarizing memory: {e}")
+
+    def _replace_with_summary(self, old_ids, summary, summary_id):
+        metadata = memory_metadata(summary, summary_id)
+        embedding = self.embedder.embed([summary])
+        with self.lock:
+            for start in range(0, len(old_ids), CHROMA_BATCH_SIZE):
+                self.collection.delete(ids=old_ids[start:start + CHROMA_BATCH_SIZE])
+            self.collection.upsert(
+                documents=[summary], ids=[summary_id], metadatas=[metadata],
+                embeddings=embedding,
+            )
+            record = {
+                "op": "replace",
+                "delete_ids": old_ids,
+                "ids": [summary_id],
+                "documents": [summary],
+                "metadatas": [metadata],
+            }
+            self._apply_record(record)
+            self._persist(record)
 
     def check_internet(self, timeout=5):
-        try:
-            requests.get("https://www.google.com", timeout=timeout)
-            return True
-        except requests.RequestException:
-            return False
+        return network.get_monitor().is_online(timeout=timeout)
 
     def dynamic_update(self):
         if self.check_internet():
             try:
-                response = requests.get("https://api.duckduckgo.com/?q=latest+news&format=json", timeout=5)
-                if response.status_code == 200:
-                    data = response.json()
+                data = network.fetch_json(network.endpoint("news"), timeout=5)
+                if data is not None:
                     abstract = data.get("Abstract", "")
                     self.add_memory(abstract, f"news_{int(time.time())}")
                     print("Online data added to memory.")
@@ -102,4 +543,4 @@ class EONMemoryManager:
         self.summarize_memory_if_needed()
 
     def recall_past_conversations(self, last_n=5):
-        return self.memory.get("conversation_log", [])[-last_n:]
+        return self.conversations.recent(last_n)
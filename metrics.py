@@ -0,0 +1,242 @@
+import os
+import sys
+import atexit
+import json
+import time
+import random
+import threading
+import functools
+import traceback
+from collections import Counter
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from journal import atomic_write_json
+
+
+class Histogram:
+    """Latency samples for one stage, kept in a fixed-size reservoir so memory stays bounded."""
+
+    def __init__(self, reservoir_size=2048):
+        self.reservoir_size = reservoir_size
+        self.samples = []
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.total += value
+        if len(self.samples) < self.reservoir_size:
+            self.samples.append(value)
+        else:
+            index = random.randrange(self.count)
+            if index < self.reservoir_size:
+                self.samples[index] = value
+
+    def percentile(self, q):
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "p50": self.percentile(0.50),
+            "p95": self.percentile(0.95),
+            "p99": self.percentile(0.99),
+        }
+
+
+class Metrics:
+    """Per-stage latency histograms for the turn pipeline."""
+
+    def __init__(self):
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def snapshot(self):
+        with self._lock:
+            return {stage: histogram.summary() for stage, histogram in sorted(self.histograms.items())}
+
+    def prometheus(self):
+        """Render the histograms in the Prometheus text exposition format (as summaries)."""
+        lines = [
+            "# HELP eon_stage_seconds Latency of EON pipeline stages.",
+            "# TYPE eon_stage_seconds summary",
+        ]
+        for stage, summary in self.snapshot().items():
+            for quantile, key in (("0.5", "p50"), ("0.95", "p95"), ("0.99", "p99")):
+                value = summary[key]
+                lines.append(f'eon_stage_seconds{{stage="{stage}",quantile="{quantile}"}} {value:.6f}')
+            lines.append(f'eon_stage_seconds_sum{{stage="{stage}"}} {summary["sum"]:.6f}')
+            lines.append(f'eon_stage_seconds_count{{stage="{stage}"}} {summary["count"]}')
+        return "\n".join(lines) + "\n"
+
+    def dump_json(self, path):
+        atomic_write_json(path, {"timestamp": time.time(), "stages": self.snapshot()})
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+
+
+class SamplingProfiler:
+    """Samples every thread's stack at ``interval`` seconds while enabled; toggled at runtime."""
+
+    def __init__(self, interval=0.01, max_depth=12):
+        self.interval = interval
+        self.max_depth = max_depth
+        self.stacks = Counter()
+        self.samples = 0
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        with self._lock:
+            if self.enabled:
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="eon-profiler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = traceback.extract_stack(frame, limit=self.max_depth)
+                key = ";".join(f"{os.path.basename(f.filename)}:{f.name}" for f in stack)
+                with self._lock:
+                    self.stacks[key] += 1
+            with self._lock:
+                self.samples += 1
+
+    def report(self, top=20):
+        """Most frequently sampled stacks in collapsed (flame graph) format."""
+        with self._lock:
+            return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common(top)) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self.stacks.clear()
+            self.samples = 0
+
+
+metrics = Metrics()
+profiler = SamplingProfiler()
+
+
+def timer(stage):
+    return metrics.timer(stage)
+
+
+def timed(stage):
+    """Decorator form of ``timer``."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with metrics.timer(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/metrics":
+            self._send(metrics.prometheus(), "text/plain; version=0.0.4")
+        elif url.path == "/metrics.json":
+            self._send(json.dumps(metrics.snapshot()), "application/json")
+        elif url.path == "/profiler":
+            action = parse_qs(url.query).get("action", [""])[0]
+            if action == "start":
+                profiler.start()
+            elif action == "stop":
+                profiler.stop()
+            elif action == "reset":
+                profiler.reset()
+            self._send(f"# enabled={profiler.enabled} samples={profiler.samples}\n" + profiler.report(), "text/plain")
+        else:
+            self.send_error(404)
+
+    def _send(self, body, content_type):
+        payload = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server = None
+
+
+def start_metrics_server(port=None, host="127.0.0.1"):
+    """Serve ``/metrics`` (Prometheus), ``/metrics.json`` and ``/profiler?action=start|stop|reset`` locally.
+
+    The port defaults to ``EON_METRICS_PORT`` (9464). Calling it again returns the running server.
+    """
+    global _server
+    if _server is None:
+        port = int(port or os.environ.get("EON_METRICS_PORT", 9464))
+        _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        threading.Thread(target=_server.serve_forever, name="eon-metrics", daemon=True).start()
+    return _server
+
+
+def maybe_start_from_env():
+    """Start the endpoint when ``EON_METRICS_PORT`` is set and the profiler when ``EON_PROFILE=1``.
+
+    When ``EON_METRICS_JSON`` names a file, the histograms are dumped there at exit.
+    """
+    if os.environ.get("EON_METRICS_PORT"):
+        try:
+            start_metrics_server()
+        except OSError as e:
+            print(f"Error starting metrics server: {e}")
+    if os.environ.get("EON_PROFILE") == "1":
+        profiler.start()
+    dump_path = os.environ.get("EON_METRICS_JSON")
+    if dump_path and not _dump_registered:
+        _register_dump(dump_path)
+
+
+_dump_registered = False
+
+
+def _register_dump(path):
+    global _dump_registered
+    atexit.register(metrics.dump_json, path)
+    _dump_registered = True
@@ -0,0 +1,118 @@
+import os
+import time
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+import metrics
+
+# Each endpoint can be overridden with EON_<NAME>_URL, e.g. to point at a local stub server in tests.
+ENDPOINTS = {
+    "probe": "https://www.google.com",
+    "news": "https://api.duckduckgo.com/?q=latest+news&format=json",
+    "quote": "https://api.quotable.io/random",
+    "search": "https://www.google.com/",
+}
+
+_session = None
+_monitor = None
+_lock = threading.Lock()
+
+
+def endpoint(name):
+    return os.environ.get(f"EON_{name.upper()}_URL", ENDPOINTS[name])
+
+
+def get_session():
+    """Process-wide ``requests.Session`` with a keep-alive connection pool."""
+    global _session
+    with _lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=8, pool_maxsize=16)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+        return _session
+
+
+class ConnectivityMonitor:
+    """Caches the result of a connectivity probe so callers don't each block on the network.
+
+    A successful probe is trusted for ``ttl`` seconds. After failures the next
+    probe is pushed back exponentially (``ttl``, ``2*ttl``, ... up to
+    ``max_backoff``), so an offline box pays the probe timeout rarely rather
+    than on every call. Only one thread probes at a time; others get the last
+    known state.
+    """
+
+    def __init__(self, probe_url=None, ttl=30.0, timeout=2.0, max_backoff=300.0):
+        self.probe_url = probe_url
+        self.ttl = ttl
+        self.timeout = timeout
+        self.max_backoff = max_backoff
+        self._online = False
+        self._failures = 0
+        self._next_check = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @metrics.timed("network.probe")
+    def _probe(self, timeout):
+        try:
+            get_session().head(self.probe_url or endpoint("probe"), timeout=timeout, allow_redirects=True)
+            return True
+        except requests.RequestException:
+            return False
+
+    def _record(self, online):
+        now = time.monotonic()
+        with self._lock:
+            self._online = online
+            if online:
+                self._failures = 0
+                self._next_check = now + self.ttl
+            else:
+                self._failures += 1
+                self._next_check = now + min(self.ttl * 2 ** (self._failures - 1), self.max_backoff)
+
+    def is_online(self, timeout=None):
+        with self._lock:
+            if self._probing or time.monotonic() < self._next_check:
+                return self._online
+            self._probing = True
+        try:
+            online = self._probe(timeout or self.timeout)
+            self._record(online)
+            return online
+        finally:
+            with self._lock:
+                self._probing = False
+
+    def report_failure(self):
+        """Let callers whose own request failed to connect mark the network as down."""
+        self._record(False)
+
+    def invalidate(self):
+        with self._lock:
+            self._next_check = 0.0
+
+
+def get_monitor():
+    global _monitor
+    with _lock:
+        if _monitor is None:
+            _monitor = ConnectivityMonitor()
+        return _monitor
+
+
+@metrics.timed("network.fetch")
+def fetch_json(url, timeout=5, **kwargs):
+    """GET ``url`` through the pooled session, returning parsed JSON or None on a non-200 reply."""
+    try:
+        response = get_session().get(url, timeout=timeout, **kwargs)
+    except requests.ConnectionError:
+        get_monitor().report_failure()
+        raise
+    if response.status_code != 200:
+        return None
+    return response.json()
@@ -0,0 +1,72 @@
+import atexit
+import threading
+import weakref
+from journal import atomic_write_json
+
+_writers = weakref.WeakSet()
+
+
+class DebouncedJSONWriter:
+    """Coalesces frequent saves of one JSON file into occasional atomic writes.
+
+    Owners call ``mark_dirty`` after each change instead of rewriting the file.
+    The document (from ``snapshot()``) is written once ``flush_every`` changes
+    have piled up or ``flush_interval`` seconds after the first unsaved change,
+    whichever comes first, and always on ``close`` and at interpreter exit.
+    Writes go through ``atomic_write_json``, so a crash leaves the previous
+    version intact rather than a torn file.
+
+    ``snapshot`` is called with the writer's lock held, so it may take the
+    owner's lock, but ``mark_dirty`` must then never be called while holding it.
+    """
+
+    def __init__(self, path, snapshot, flush_every=20, flush_interval=2.0):
+        self.path = path
+        self.snapshot = snapshot
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.pending = 0
+        self.writes = 0
+        self._timer = None
+        self._lock = threading.RLock()
+        _writers.add(self)
+
+    @property
+    def dirty(self):
+        return self.pending > 0
+
+    def mark_dirty(self):
+        with self._lock:
+            self.pending += 1
+            if self.pending >= self.flush_every:
+                self.flush()
+            elif self._timer is None and self.flush_interval is not None:
+                self._timer = threading.Timer(self.flush_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self.pending:
+                return
+            try:
+                atomic_write_json(self.path, self.snapshot())
+                self.pending = 0
+                self.writes += 1
+            except OSError as e:
+                print(f"Error saving {self.path}: {e}")
+
+    def close(self):
+        self.flush()
+        _writers.discard(self)
+
+
+def flush_all():
+    for writer in list(_writers):
+        writer.flush()
+
+
+atexit.register(flush_all)
@@ -1,6 +1,10 @@
 import json
 import time
+import threading
 import requests
+import metrics
+import network
+from persistence import DebouncedJSONWriter
 
 class Personality:
     def __init__(self, personality_file="memory/traits.json"):
@@ -20,10 +24,14 @@ class Personality:
             "adventurous": True
         }
         self.last_updated = None
+        # Serializes trait updates and writes when one instance is shared across sessions.
+        self.lock = threading.RLock()
+        self.writer = DebouncedJSONWriter(personality_file, self._snapshot)
         self.load_personality()
         
     def get_traits(self):
-        return self.traits
+        with self.lock:
+            return dict(self.traits)
 
     def load_personality(self):
         try:
@@ -33,28 +41,38 @@ class Personality:
                 self.last_updated = data.get("last_updated", None)
         except FileNotFoundError:
             self.save_personality()
+            self.flush()
+
+    def _snapshot(self):
+        with self.lock:
+            return {
+                "traits": dict(self.traits),
+                "last_updated": time.strftime("%Y-%m-%d %H:%M:%S")
+            }
 
     def save_personality(self):
-        data = {
-            "traits": self.traits,
-            "last_updated": time.strftime("%Y-%m-%d %H:%M:%S")
-        }
-        with open(self.personality_file, "w") as f:
-            json.dump(data, f, indent=4)
+        """Schedule a write of the traits; see ``DebouncedJSONWriter``.
+
+        Call it after releasing ``self.lock``: the writer's flush takes that lock in ``_snapshot``.
+        """
+        self.writer.mark_dirty()
+
+    @metrics.timed("personality.save")
+    def flush(self):
+        self.writer.flush()
+
+    def close(self):
+        self.writer.close()
 
     def check_internet(self, timeout=5):
-        try:
-            requests.get("https://www.google.com", timeout=timeout)
-            return True
-        except requests.RequestException:
-            return False
+        return network.get_monitor().is_online(timeout=timeout)
 
+    @metrics.timed("personality.fetch")
     def fetch_dynamic_data(self):
         if self.check_internet():
             try:
-                response = requests.get("https://api.quotable.io/random", timeout=5)
-                if response.status_code == 200:
-                    data = response.json()
+                data = network.fetch_json(network.endpoint("quote"), timeout=5)
+                if data is not None:
                     return data.get("content", "No data available")
             except requests.RequestException:
                 return None
@@ -64,22 +82,21 @@ class Personality:
         if self.check_internet():
             dynamic_data = self.fetch_dynamic_data()
             if dynamic_data:
-                if "innovate" in dynamic_data.lower():
-                    self.traits["innovative"] = True
-                else:
-                    self.traits["innovative"] = False
-                self.last_updated = time.strftime("%Y-%m-%d %H:%M:%S")
+                with self.lock:
+                    self.traits["innovative"] = "innovate" in dynamic_data.lower()
+                    self.last_updated = time.strftime("%Y-%m-%d %H:%M:%S")
                 self.save_personality()
                 return f"Personality updated with online insight: {dynamic_data}"
             return "Dynamic data could not be fetched."
         return "No internet connection. Personality remains unchanged."
 
     def learn_from_conversation(self, conversation_context):
-        if "fun" in conversation_context.lower():
-            self.traits["humorous"] = True
-        if "serious" in conversation_context.lower():
-            self.traits["empathetic"] = True
-            self.traits["analytical"] = True
+        with self.lock:
+            if "fun" in conversation_context.lower():
+                self.traits["humorous"] = True
+            if "serious" in conversation_context.lower():
+                self.traits["empathetic"] = True
+                self.traits["analytical"] = True
         self.save_personality()
         return "Personality adapted based on conversation context."
 
@@ -0,0 +1,93 @@
+from tokens import count_tokens
+
+MEMORY_HEADER = "Based on what I remember:"
+QUERY_HEADER = "Now, in response to your query:"
+
+SYSTEM_PROMPT = (
+    "You are EON, an AI customer support assistant. Use the remembered context below only when it "
+    "is relevant, and answer the user's latest message directly."
+)
+
+
+def format_traits(personality_traits):
+    """Compact trait string: enabled boolean traits by name, other values as ``name=value``."""
+    if not isinstance(personality_traits, dict):
+        return str(personality_traits)
+    parts = []
+    for name, value in personality_traits.items():
+        if value is True:
+            parts.append(name)
+        elif value is not False and value is not None:
+            parts.append(f"{name}={value}")
+    return ", ".join(parts)
+
+
+def _truncate(text, max_tokens):
+    """Cut ``text`` down to at most ``max_tokens`` tokens on word boundaries."""
+    words = text.split()
+    tokens = count_tokens(text)
+    while words and tokens > max_tokens:
+        keep = len(words) * max_tokens // tokens
+        words = words[:keep] if keep < len(words) else words[:-1]
+        tokens = count_tokens(" ".join(words))
+    return " ".join(words)
+
+
+class PromptBuilder:
+    """Assembles chat messages for ollama within a fixed token budget.
+
+    The system message (instructions plus compactly serialized traits) does not
+    depend on the user's message, so it stays byte-identical across turns and
+    ollama can reuse its KV cache for that prefix. Retrieved memories are taken
+    best score first and dropped or trimmed once ``max_tokens`` would be
+    exceeded. The token count of every built prompt is returned with it and
+    reported in the turn's stats line (``responder.format_stats``).
+    """
+
+    def __init__(self, max_tokens=2048, system_prompt=SYSTEM_PROMPT, min_memory_tokens=32):
+        self.max_tokens = max_tokens
+        self.system_prompt = system_prompt
+        self.min_memory_tokens = min_memory_tokens
+
+    def system_message(self, personality_traits):
+        traits = format_traits(personality_traits)
+        content = f"{self.system_prompt}\nPersonality traits: {traits}" if traits else self.system_prompt
+        return {"role": "system", "content": content}
+
+    @staticmethod
+    def _ranked(memories):
+        """Accept plain strings or ``search_memory`` hits; hits are ordered by score."""
+        hits = [m if isinstance(m, dict) else {"document": m} for m in memories]
+        if all("score" in hit for hit in hits):
+            hits = sorted(hits, key=lambda hit: hit["score"], reverse=True)
+        return [hit["document"] for hit in hits]
+
+    def build(self, memories, user_input, personality_traits):
+        """Return ``(messages, token_count)`` for one turn."""
+        system = self.system_message(personality_traits)
+        used = count_tokens(system["content"])
+        query = _truncate(user_input, max(self.max_tokens - used, 1))
+        used += count_tokens(query) + count_tokens(f"{MEMORY_HEADER} {QUERY_HEADER}")
+
+        selected = []
+        for document in self._ranked(memories):
+            used += count_tokens("-")
+            remaining = self.max_tokens - used
+            if remaining < self.min_memory_tokens:
+                break
+            tokens = count_tokens(document)
+            if tokens > remaining:
+                document = _truncate(document, remaining)
+                tokens = count_tokens(document)
+            if document:
+                selected.append(document)
+                used += tokens
+
+        if selected:
+            memory_block = "\n".join(f"- {document}" for document in selected)
+            content = f"{MEMORY_HEADER}\n{memory_block}\n\n{QUERY_HEADER} {query}"
+        else:
+            content = f"User: {query}"
+        messages = [system, {"role": "user", "content": content}]
+        token_count = sum(count_tokens(message["content"]) for message in messages)
+        return messages, token_count
@@ -0,0 +1,96 @@
+import atexit
+import threading
+import chromadb
+from engine import TurnEngine
+from memory_manager import resolve_chroma_path
+from personality import Personality
+from response_cache import ResponseCache
+from tenants import TenantMemoryPool
+
+
+class ResourceRegistry:
+    """Process-wide cache of expensive objects, built once and shared by every session.
+
+    Entries live until they are explicitly invalidated or the process exits; on
+    either, a ``close()`` method on the resource is called if it has one.
+    """
+
+    def __init__(self):
+        self._resources = {}
+        # Re-entrant so a factory can pull in other registry resources (e.g. the Chroma client).
+        self._lock = threading.RLock()
+
+    def get(self, key, factory):
+        with self._lock:
+            if key not in self._resources:
+                self._resources[key] = factory()
+            return self._resources[key]
+
+    def invalidate(self, key=None):
+        """Drop one resource (or all of them when ``key`` is None) so the next ``get`` rebuilds it."""
+        with self._lock:
+            # Newest first, so dependents (e.g. a turn engine) close before what they use.
+            keys = list(reversed(self._resources)) if key is None else [key]
+            for k in keys:
+                resource = self._resources.pop(k, None)
+                close = getattr(resource, "close", None)
+                if callable(close):
+                    try:
+                        close()
+                    except Exception as e:
+                        print(f"Error closing resource {k}: {e}")
+
+    def keys(self):
+        with self._lock:
+            return list(self._resources)
+
+    def close_all(self):
+        self.invalidate()
+
+
+registry = ResourceRegistry()
+atexit.register(registry.close_all)
+
+
+def get_chroma_client(path=None):
+    """Shared client for ``path``, defaulting to ``EON_CHROMA_PATH`` or adaptive_memory/eon_db."""
+    path = resolve_chroma_path(path)
+    return registry.get(("chroma", path), lambda: chromadb.PersistentClient(path=path))
+
+
+def get_personality(personality_file="memory/traits.json"):
+    return registry.get(("personality", personality_file), lambda: Personality(personality_file=personality_file))
+
+
+def get_response_cache(path="adaptive_memory/response_cache.json"):
+    # Shares the tenants' embedding cache, so the semantic tier reuses retrieval's query vectors.
+    return registry.get(("response_cache", path), lambda: ResponseCache(path=path, embedder=get_tenant_pool().embedder))
+
+
+def get_tenant_pool(base_dir="adaptive_memory/tenants"):
+    return registry.get(("tenants", base_dir), lambda: TenantMemoryPool(base_dir=base_dir, chroma_client=get_chroma_client()))
+
+
+def get_tenant_memory(tenant_id, ephemeral=False):
+    return get_tenant_pool().get(tenant_id, ephemeral=ephemeral)
+
+
+def get_turn_engine(personality_file="memory/traits.json"):
+    """Turn engine without a default store; callers pass each turn's tenant memory manager."""
+    return registry.get(
+        ("engine", personality_file),
+        lambda: TurnEngine(personality=get_personality(personality_file), response_cache=get_response_cache()),
+    )
+
+
+def reload_tenant_memory(tenant_id):
+    """Reload only ``tenant_id``'s memory and re-read the traits file in place, leaving shared resources open."""
+    get_tenant_pool().reload(tenant_id)
+    personality = get_personality()
+    personality.flush()
+    personality.load_personality()
+
+
+def invalidate_all():
+    """Close every shared resource; for shutdown or admin use, since it affects all sessions."""
+    registry.invalidate()
@@ -0,0 +1,152 @@
+import time
+import ollama
+import metrics
+from prompt_builder import PromptBuilder
+
+MODEL = "llama3.2"
+
+default_prompt_builder = PromptBuilder()
+
+
+class _StreamState:
+    """Reply text, token count and timings accumulated from ollama's streamed chunks."""
+
+    def __init__(self):
+        self.parts = []
+        self.token_count = 0
+        self.eval_count = self.eval_duration = None
+        self.start = time.perf_counter()
+        self.first_token_at = None
+
+    def consume(self, chunk):
+        """Record one chunk and return its token text (empty for e.g. the final stats chunk)."""
+        token = chunk["message"]["content"]
+        if token:
+            if self.first_token_at is None:
+                self.first_token_at = time.perf_counter()
+            self.parts.append(token)
+            self.token_count += 1
+        if chunk.get("done"):
+            self.eval_count = chunk.get("eval_count")
+            self.eval_duration = chunk.get("eval_duration")
+        return token
+
+    def fail(self, error):
+        message = f"Error obtaining response: {error}"
+        self.parts.append(message)
+        return message
+
+    def stats(self):
+        return turn_stats(self.start, self.first_token_at, time.perf_counter(), self.token_count,
+                          self.eval_count, self.eval_duration)
+
+
+class ResponseStream:
+    """Iterate (or ``async for``) to receive response tokens as ollama produces them.
+
+    Once iteration finishes, ``text`` holds the full reply and ``stats`` the
+    time-to-first-token and generation throughput for the turn. Async
+    iteration streams through ``client``, an ``ollama.AsyncClient`` (one is
+    created per stream if not given), so it never ties up a thread.
+    ``prompt_tokens``, when known, is carried into ``stats``.
+    """
+
+    def __init__(self, messages, model=MODEL, client=None, prompt_tokens=None):
+        self.messages = messages
+        self.prompt_tokens = prompt_tokens
+        self.model = model
+        self.client = client
+        self.text = ""
+        self.error = None
+        self.stats = {}
+
+    def _finish(self, state):
+        self.text = "".join(state.parts)
+        self.stats = state.stats()
+        if self.prompt_tokens is not None:
+            self.stats["prompt_tokens"] = self.prompt_tokens
+        record_llm_stats(self.stats)
+
+    def __iter__(self):
+        state = _StreamState()
+        try:
+            stream = ollama.chat(
+                model=self.model,
+                messages=self.messages,
+                stream=True
+            )
+            for chunk in stream:
+                token = state.consume(chunk)
+                if token:
+                    yield token
+        except Exception as e:
+            self.error = state.fail(e)
+            yield self.error
+        finally:
+            self._finish(state)
+
+    async def __aiter__(self):
+        state = _StreamState()
+        client = self.client or ollama.AsyncClient()
+        try:
+            stream = await client.chat(
+                model=self.model,
+                messages=self.messages,
+                stream=True
+            )
+            async for chunk in stream:
+                token = state.consume(chunk)
+                if token:
+                    yield token
+        except Exception as e:
+            self.error = state.fail(e)
+            yield self.error
+        finally:
+            self._finish(state)
+            if self.client is None:
+                await client.close()
+
+
+def turn_stats(start, first_token_at, end, token_count, eval_count=None, eval_duration=None):
+    """Time-to-first-token and tokens/sec, preferring ollama's own eval counters when reported."""
+    ttft = (first_token_at - start) if first_token_at is not None else None
+    if eval_count and eval_duration:
+        tokens = eval_count
+        tokens_per_sec = eval_count / (eval_duration / 1e9)
+    else:
+        tokens = token_count
+        generation_time = end - (first_token_at or start)
+        tokens_per_sec = token_count / generation_time if generation_time > 0 else 0.0
+    return {
+        "time_to_first_token": ttft,
+        "tokens": tokens,
+        "tokens_per_sec": tokens_per_sec,
+        "total_time": end - start,
+    }
+
+
+def record_llm_stats(stats):
+    if stats.get("time_to_first_token") is not None:
+        metrics.metrics.observe("llm.first_token", stats["time_to_first_token"])
+    metrics.metrics.observe("llm.total", stats["total_time"])
+
+
+def format_stats(stats):
+    ttft = stats.get("time_to_first_token")
+    ttft_text = f"{ttft:.2f}s" if ttft is not None else "n/a"
+    text = f"first token {ttft_text}, {stats.get('tokens_per_sec', 0.0):.1f} tokens/s, {stats.get('total_time', 0.0):.2f}s total"
+    if stats.get("prompt_tokens") is not None:
+        text = f"prompt {stats['prompt_tokens']} tokens, {text}"
+    return text
+
+
+def stream_response(memories, user_input, personality_traits, model=MODEL, prompt_builder=None):
+    messages, prompt_tokens = (prompt_builder or default_prompt_builder).build(memories, user_input, personality_traits)
+    return ResponseStream(messages, model=model, prompt_tokens=prompt_tokens)
+
+
+def formulate_response(memories, user_input, personality_traits):
+    stream = stream_response(memories, user_input, personality_traits)
+    for _ in stream:
+        pass
+    return stream.text
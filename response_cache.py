@@ -0,0 +1,213 @@
+import os
+import re
+import json
+import math
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from journal import atomic_write_json
+
+
+def normalize_text(text):
+    text = re.sub(r"\s+", " ", text.lower()).strip()
+    return text.rstrip("?!. ")
+
+
+def _traits_key(personality_traits):
+    if isinstance(personality_traits, dict):
+        return json.dumps(personality_traits, sort_keys=True, default=str)
+    return str(personality_traits)
+
+
+def _cosine(a, b):
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+class ResponseCache:
+    """Cache of LLM replies keyed on the normalized prompt inputs.
+
+    The exact tier matches on a hash of (traits, retrieved memory ids, normalized
+    input). When ``similarity_threshold`` is set, a semantic tier also returns the
+    reply to the most similar cached input asked under the same traits and
+    memories, provided its cosine similarity reaches the threshold. Entries are
+    evicted least-recently-used beyond ``max_entries`` and after ``ttl`` seconds.
+
+    ``embedder`` is the memory store's ``EmbeddingCache``, so the query vector
+    computed for retrieval is reused here. Embedding and similarity scoring run
+    outside the lock, which only guards the entry dicts.
+    """
+
+    def __init__(self, embedder, path="adaptive_memory/response_cache.json", max_entries=1000, ttl=24 * 3600,
+                 similarity_threshold=None, save_every=20):
+        self.embedder = embedder
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+        self.save_every = save_every
+        self.entries = OrderedDict()
+        # context key -> keys of entries cached under it, so semantic candidates are a dict lookup
+        self._by_context = {}
+        self.hits = {"exact": 0, "semantic": 0}
+        self.misses = 0
+        self._unsaved = 0
+        self._lock = threading.RLock()
+        # Serializes file writes, which happen outside ``_lock``.
+        self._save_lock = threading.Lock()
+        self.load()
+
+    @staticmethod
+    def context_key(personality_traits, memory_ids):
+        payload = json.dumps([_traits_key(personality_traits), sorted(memory_ids)])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @classmethod
+    def make_key(cls, personality_traits, memory_ids, user_input):
+        payload = cls.context_key(personality_traits, memory_ids) + normalize_text(user_input)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _expired(self, entry, now):
+        return self.ttl is not None and now - entry["created"] > self.ttl
+
+    def _index(self, key, entry):
+        self._by_context.setdefault(entry["context"], set()).add(key)
+
+    def _unindex(self, key, entry):
+        keys = self._by_context.get(entry["context"])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_context[entry["context"]]
+
+    def _remove(self, key):
+        self._unindex(key, self.entries.pop(key))
+
+    def get(self, personality_traits, memory_ids, user_input):
+        now = time.time()
+        context = self.context_key(personality_traits, memory_ids)
+        key = self.make_key(personality_traits, memory_ids, user_input)
+        candidates = []
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None and self._expired(entry, now):
+                self._remove(key)
+                entry = None
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits["exact"] += 1
+                return entry["response"]
+            if self.similarity_threshold is not None:
+                for candidate in self._by_context.get(context, ()):
+                    candidate_entry = self.entries[candidate]
+                    if candidate_entry.get("embedding") and not self._expired(candidate_entry, now):
+                        candidates.append((candidate, candidate_entry["embedding"]))
+        hit_key = self._semantic_lookup(candidates, user_input) if candidates else None
+        with self._lock:
+            # The entry may have been evicted while we were scoring.
+            if hit_key is not None and hit_key in self.entries:
+                self.entries.move_to_end(hit_key)
+                self.hits["semantic"] += 1
+                return self.entries[hit_key]["response"]
+            self.misses += 1
+        return None
+
+    def _semantic_lookup(self, candidates, user_input):
+        try:
+            query_embedding = self.embedder.embed_query(user_input)
+        except Exception as e:
+            print(f"Error embedding cache query: {e}")
+            return None
+        best_key, best_score = None, self.similarity_threshold
+        for key, embedding in candidates:
+            score = _cosine(query_embedding, embedding)
+            if score >= best_score:
+                best_key, best_score = key, score
+        return best_key
+
+    def put(self, personality_traits, memory_ids, user_input, response):
+        key = self.make_key(personality_traits, memory_ids, user_input)
+        entry = {
+            "response": response,
+            "created": time.time(),
+            "context": self.context_key(personality_traits, memory_ids),
+        }
+        if self.similarity_threshold is not None:
+            try:
+                entry["embedding"] = self.embedder.embed_query(user_input)
+            except Exception as e:
+                print(f"Error embedding cache entry: {e}")
+        with self._lock:
+            if key in self.entries:
+                self._remove(key)
+            self.entries[key] = entry
+            self._index(key, entry)
+            self._evict()
+            self._unsaved += 1
+            due = self._unsaved >= self.save_every
+        if due:
+            self.save()
+
+    def _evict(self):
+        while len(self.entries) > self.max_entries:
+            self._unindex(*self.entries.popitem(last=False))
+
+    def _purge_expired(self):
+        now = time.time()
+        for key in [k for k, entry in self.entries.items() if self._expired(entry, now)]:
+            self._remove(key)
+
+    def stats(self):
+        with self._lock:
+            hits = self.hits["exact"] + self.hits["semantic"]
+            total = hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "exact_hits": self.hits["exact"],
+                "semantic_hits": self.hits["semantic"],
+                "misses": self.misses,
+                "hit_rate": hits / total if total else 0.0,
+            }
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+            with self._lock:
+                self.entries = OrderedDict(data.get("entries", []))
+                self._by_context = {}
+                for key, entry in self.entries.items():
+                    self._index(key, entry)
+                self._purge_expired()
+                self._evict()
+        except Exception as e:
+            print(f"Error loading response cache: {e}")
+
+    def save(self):
+        with self._save_lock:
+            with self._lock:
+                # Expired entries are otherwise only dropped when looked up, so sweep them before writing.
+                self._purge_expired()
+                data = {"entries": list(self.entries.items())}
+                unsaved = self._unsaved
+            try:
+                atomic_write_json(self.path, data)
+            except OSError as e:
+                print(f"Error saving response cache: {e}")
+                return
+            with self._lock:
+                self._unsaved -= unsaved
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+            self._by_context.clear()
+        self.save()
+
+    def close(self):
+        if self._unsaved:
+            self.save()
@@ -1,9 +1,10 @@
 import streamlit as st
-import hashlib
-import ollama
-import requests
-from memory_manager import EONMemoryManager
-from personality import Personality
+import uuid
+import metrics
+import network
+import resources
+from engine import memory_id_for
+from responder import format_stats
 
 st.set_page_config(page_title="EON AI Assistant", layout="wide", initial_sidebar_state="expanded")
 # ----- Custom CSS for a modern/3D look with subtle 3D animations -----
@@ -49,38 +50,19 @@ div.stExpander > div > div > div {
 """
 st.markdown(custom_css, unsafe_allow_html=True)
 
+HISTORY_PAGE_SIZE = 10
+
 # ----- Helper Functions -----
 def generate_memory_title(user_message):
     """Generate a title from the first user message."""
     return user_message[:50] + "..." if len(user_message) > 50 else user_message
 
-def formulate_response(memories, user_input, personality_traits):
-    if memories:
-        combined_memory = " ".join(memories)
-        prompt = (
-            f"Personality traits: {personality_traits}\n"
-            f"Based on what I remember: {combined_memory}\n"
-            f"Now, in response to your query: {user_input}"
-        )
-    else:
-        prompt = f"Personality traits: {personality_traits}\nUser: {user_input}"
-    try:
-        response = ollama.chat(
-            model="llama3.2",
-            messages=[{"role": "user", "content": prompt}]
-        )
-        return response["message"]["content"]
-    except Exception as e:
-        return f"Error obtaining response: {e}"
-
 def perform_search(query):
     """Simulated search function using DuckDuckGo Instant Answer API."""
     try:
-        url = "https://www.google.com/"
         params = {"q": query, "format": "json"}
-        res = requests.get(url, params=params, timeout=5)
-        if res.status_code == 200:
-            data = res.json()
+        data = network.fetch_json(network.endpoint("search"), params=params, timeout=5)
+        if data is not None:
             abstract = data.get("Abstract", "No results found.")
             return abstract
         else:
@@ -91,6 +73,7 @@ def perform_search(query):
 # ----- Main App -----
 def main():
     st.title("EON AI Assistant 🤖")
+    metrics.maybe_start_from_env()
     
     # ----- Sidebar: Settings & Tools -----
     st.sidebar.header("Settings & Tools")
@@ -108,7 +91,7 @@ def main():
         st.session_state.saved_conversations = {}
         st.success("New chat created!")
         st.rerun()
-    
+
     # Search Functionality
     st.sidebar.markdown("### Internet Search")
     search_query = st.sidebar.text_input("Search the web:")
@@ -116,19 +99,56 @@ def main():
         search_results = perform_search(search_query)
         st.sidebar.markdown(f"**Results:** {search_results}")
     
+    # Workspace: each tenant gets its own memory partition; kept in the URL so it survives refreshes.
+    # Sessions share the "default" memory unless they pick a workspace or ask for a private scratch one.
+    if "tenant_id" not in st.session_state:
+        st.session_state.tenant_id = st.query_params.get("tenant") or "default"
+    if st.sidebar.button("🧪 New Private Workspace", help="Scratch memory that is deleted once it sits idle"):
+        st.session_state.tenant_id = "scratch-" + uuid.uuid4().hex[:12]
+        st.session_state.ephemeral_tenant = st.session_state.tenant_id
+    tenant_id = st.sidebar.text_input("Workspace", key="tenant_id", help="Use 'default' for the shared memory")
+    st.query_params["tenant"] = tenant_id
+    ephemeral = tenant_id == st.session_state.get("ephemeral_tenant")
+
+    # Reload this workspace's memory from disk; other sessions' resources stay open
+    if st.sidebar.button("🔄 Reload Memory"):
+        resources.reload_tenant_memory(tenant_id)
+        st.rerun()
+    memory_manager = resources.get_tenant_memory(tenant_id, ephemeral=ephemeral)
+    
     # Memory Viewer in Sidebar (Saved Conversations)
     st.sidebar.markdown("### Saved Conversations")
-    memory_manager = EONMemoryManager(db_path="adaptive_memory/eon_memory.json")
-    conversation_log = memory_manager.memory.get("conversation_log", [])
-    if conversation_log:
-        for idx, entry in enumerate(conversation_log, start=1):
+    history_search = st.sidebar.text_input("Search conversations:")
+    total_conversations = memory_manager.count_conversations(history_search or None)
+    if total_conversations:
+        page_count = (total_conversations + HISTORY_PAGE_SIZE - 1) // HISTORY_PAGE_SIZE
+        page = st.sidebar.number_input("Page", min_value=1, max_value=page_count, value=1, step=1) - 1
+        # Only the visible page is fetched and rendered, newest first
+        entries = memory_manager.get_conversations(page, HISTORY_PAGE_SIZE, search=history_search or None)
+        for offset, entry in enumerate(entries):
+            idx = total_conversations - page * HISTORY_PAGE_SIZE - offset
             title = generate_memory_title(entry.get("user", "Conversation"))
             with st.sidebar.expander(f"Conversation {idx}: {title}"):
                 st.markdown(f"**You:** {entry.get('user', '')}")
                 st.markdown(f"**EON:** {entry.get('eon', '')}")
+        st.sidebar.caption(f"Page {page + 1} of {page_count} ({total_conversations} conversations)")
     else:
         st.sidebar.write("No saved conversations yet.")
     
+    with st.sidebar.expander("Latency Metrics"):
+        stages = metrics.metrics.snapshot()
+        if stages:
+            st.table({stage: {key: round(value, 4) for key, value in summary.items()} for stage, summary in stages.items()})
+        else:
+            st.write("No turns measured yet.")
+        profiling = st.checkbox("Sampling profiler", value=metrics.profiler.enabled)
+        if profiling and not metrics.profiler.enabled:
+            metrics.profiler.start()
+        elif not profiling and metrics.profiler.enabled:
+            metrics.profiler.stop()
+        if metrics.profiler.samples:
+            st.code(metrics.profiler.report(top=10))
+
     st.sidebar.markdown("### Effects & Animations")
     use_animations = st.sidebar.checkbox("Enable Animations", value=True)
     
@@ -140,8 +160,9 @@ def main():
     if "saved_conversations" not in st.session_state:
         st.session_state.saved_conversations = {}
     
-    # Initialize Personality (using local traits file)
-    personality = Personality(personality_file="memory/traits.json")
+    # Shared Personality (using local traits file)
+    personality = resources.get_personality("memory/traits.json")
+    engine = resources.get_turn_engine()
     
     # Create two tabs: Chat and Detailed Response
     chat_tab, response_tab = st.tabs(["Chat", "Detailed Response"])
@@ -150,41 +171,42 @@ def main():
         st.header("💬 Chat Interface")
         user_input = st.text_input("You:", key="chat_input")
         if st.button("Send") and user_input:
-            with st.spinner("Generating response..."):
-                # Retrieve memories and personality traits
-                memories = memory_manager.retrieve_memory(user_input, top_k=3)
-                traits = personality.get_traits()
-                if personality_tone == "Bro":
-                    traits_str = ", ".join([k for k, v in traits.items() if v])
-                elif personality_tone == "Professional":
-                    traits_str = "professional, analytical, courteous"
-                else:
-                    traits_str = "casual, friendly"
-                
-                # Incorporate reasoning intensity into traits description
-                traits_str += f" (reasoning intensity: {reasoning_intensity})"
-                
-                # Generate response from EON
-                response = formulate_response(memories, user_input, traits_str)
-                
-                st.session_state.chat_history.append(("You", user_input))
-                st.session_state.chat_history.append(("EON", response))
-                st.session_state.response_history.append(response)
-                
-                # Save conversation as a new conversation block
-                memory_id = "memory_" + hashlib.sha256(user_input.encode()).hexdigest()
-                if memory_id not in st.session_state.saved_conversations:
-                    st.session_state.saved_conversations[memory_id] = []
-                st.session_state.saved_conversations[memory_id].append(("You", user_input))
-                st.session_state.saved_conversations[memory_id].append(("EON", response))
-                
-                memory_manager.add_memory(user_input, memory_id)
-                memory_manager.summarize_memory_if_needed()
-                
-                if use_animations:
-                    st.balloons()
-                if hasattr(st, "rerun"):
-                    st.rerun()
+            # Personality traits for the selected tone
+            traits = personality.get_traits()
+            if personality_tone == "Bro":
+                traits_str = ", ".join([k for k, v in traits.items() if v])
+            elif personality_tone == "Professional":
+                traits_str = "professional, analytical, courteous"
+            else:
+                traits_str = "casual, friendly"
+            
+            # Incorporate reasoning intensity into traits description
+            traits_str += f" (reasoning intensity: {reasoning_intensity})"
+            
+            # Stream the response from EON; the turn engine stores the memory in the background
+            turn = engine.new_turn(user_input, traits=traits_str, memory_manager=memory_manager)
+            st.markdown(f"**You:** {user_input}")
+            st.write_stream(engine.stream(turn))
+            response = turn.text
+            st.session_state.last_stats = "served from response cache" if turn.cached else format_stats(turn.stats)
+
+            st.session_state.chat_history.append(("You", user_input))
+            st.session_state.chat_history.append(("EON", response))
+            st.session_state.response_history.append(response)
+            
+            # Save conversation as a new conversation block
+            memory_id = memory_id_for(user_input)
+            if memory_id not in st.session_state.saved_conversations:
+                st.session_state.saved_conversations[memory_id] = []
+            st.session_state.saved_conversations[memory_id].append(("You", user_input))
+            st.session_state.saved_conversations[memory_id].append(("EON", response))
+            
+            if use_animations:
+                st.balloons()
+            if hasattr(st, "rerun"):
+                st.rerun()
+        if st.session_state.get("last_stats"):
+            st.caption(f"Last turn: {st.session_state.last_stats}")
         st.subheader("Conversation")
         for speaker, message in st.session_state.chat_history:
             css_class = "you" if speaker == "You" else "eon"
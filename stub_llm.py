@@ -0,0 +1,129 @@
+import json
+import time
+import hashlib
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+VOCABULARY = (
+    "sure thing here is what i found about your order account refund shipping update "
+    "the support team can help with that please try again later thanks for waiting"
+).split()
+
+
+def stub_reply(messages, tokens):
+    """Deterministic reply: the same messages always produce the same ``tokens`` words."""
+    seed = hashlib.sha256(json.dumps(messages, sort_keys=True).encode("utf-8")).digest()
+    return [VOCABULARY[seed[i % len(seed)] % len(VOCABULARY)] + " " for i in range(tokens)]
+
+
+class StubLLM:
+    """Stand-in for the ollama server's ``/api/chat`` with fixed, configurable latency.
+
+    Each reply waits ``first_token_latency`` seconds and then ``token_latency``
+    per token, streamed as NDJSON like ollama does. Point the ollama client at
+    it with ``OLLAMA_HOST`` (``url``) before ``ollama`` is imported.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, first_token_latency=0.05, token_latency=0.01, tokens=32):
+        self.first_token_latency = first_token_latency
+        self.token_latency = token_latency
+        self.tokens = tokens
+        self.requests = 0
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._handler())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                if self.path != "/api/chat":
+                    self.send_error(404)
+                    return
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+                with stub._lock:
+                    stub.requests += 1
+                stub._chat(self, request)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def _chat(self, handler, request):
+        model = request.get("model", "stub")
+        words = stub_reply(request.get("messages", []), self.tokens)
+        start = time.perf_counter()
+        time.sleep(self.first_token_latency)
+        if not request.get("stream", True):
+            time.sleep(self.token_latency * len(words))
+            body = self._chunk(model, "".join(words), done=True, start=start, eval_count=len(words))
+            payload = json.dumps(body).encode("utf-8")
+            handler.send_response(200)
+            handler.send_header("Content-Type", "application/json")
+            handler.send_header("Content-Length", str(len(payload)))
+            handler.end_headers()
+            handler.wfile.write(payload)
+            return
+        handler.send_response(200)
+        handler.send_header("Content-Type", "application/x-ndjson")
+        handler.end_headers()
+        for word in words:
+            handler.wfile.write(json.dumps(self._chunk(model, word)).encode("utf-8") + b"\n")
+            handler.wfile.flush()
+            time.sleep(self.token_latency)
+        final = self._chunk(model, "", done=True, start=start, eval_count=len(words))
+        handler.wfile.write(json.dumps(final).encode("utf-8") + b"\n")
+
+    @staticmethod
+    def _chunk(model, content, done=False, start=None, eval_count=None):
+        chunk = {
+            "model": model,
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "message": {"role": "assistant", "content": content},
+            "done": done,
+        }
+        if done:
+            elapsed = int((time.perf_counter() - start) * 1e9)
+            chunk.update({"done_reason": "stop", "total_duration": elapsed,
+                          "eval_count": eval_count, "eval_duration": elapsed})
+        return chunk
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name="stub-llm", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a deterministic stand-in for ollama's /api/chat.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--first-token-latency", type=float, default=0.05, help="Seconds before the first token")
+    parser.add_argument("--token-latency", type=float, default=0.01, help="Seconds between tokens")
+    parser.add_argument("--tokens", type=int, default=32, help="Tokens per reply")
+    args = parser.parse_args()
+
+    stub = StubLLM(args.host, args.port, args.first_token_latency, args.token_latency, args.tokens)
+    print(f"Stub LLM listening on {stub.url} (export OLLAMA_HOST={stub.url})")
+    try:
+        stub.server.serve_forever()
+    except KeyboardInterrupt:
+        stub.server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,36 @@
+import os
 import ollama
 import json
+import hashlib
 import datetime
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import metrics
+from journal import atomic_write_json
+from persistence import DebouncedJSONWriter
+from tokens import token_spans
 
 class ConversationSummary:
-    def __init__(self, summary_file="adaptive_memory/conversation_summary.json"):
+    def __init__(self, summary_file="adaptive_memory/conversation_summary.json",
+                 chunk_cache_file=None,
+                 chunk_tokens=1500, max_workers=4, max_cached_chunks=2048, max_log_entries=200):
         self.summary_file = summary_file
         self.conversation_log = []
+        # Entries beyond the newest ``max_log_entries`` are moved to an append-only archive.
+        self.max_log_entries = max_log_entries
+        self.archive_file = f"{os.path.splitext(summary_file)[0]}_archive.jsonl"
+        self._log_lock = threading.Lock()
+        self.writer = DebouncedJSONWriter(summary_file, self._snapshot)
+        # Kept next to the summary file so each tenant has its own cache.
+        self.chunk_cache_file = chunk_cache_file or f"{os.path.splitext(summary_file)[0]}_chunk_cache.json"
+        self.chunk_tokens = chunk_tokens
+        self.max_workers = max_workers
+        self.max_cached_chunks = max_cached_chunks
+        self.chunk_cache = OrderedDict()
+        self._cache_lock = threading.Lock()
         self.load_summary()
+        self.load_chunk_cache()
 
     def load_summary(self):
         try:
@@ -15,36 +39,138 @@ class ConversationSummary:
                 self.conversation_log = data.get("conversation_log", [])
         except FileNotFoundError:
             self.save_summary()
+            self.flush()
+            return
+        if len(self.conversation_log) > self.max_log_entries:
+            with self._log_lock:
+                self._rotate()
+            self.flush()
+
+    def _snapshot(self):
+        with self._log_lock:
+            return {
+                "conversation_log": list(self.conversation_log),
+                "last_updated": datetime.datetime.now().isoformat()
+            }
 
     def save_summary(self):
-        data = {
-            "conversation_log": self.conversation_log,
-            "last_updated": datetime.datetime.now().isoformat()
-        }
-        with open(self.summary_file, "w") as f:
-            json.dump(data, f, indent=4)
+        """Schedule a write of the log; see ``DebouncedJSONWriter``."""
+        self.writer.mark_dirty()
+
+    @metrics.timed("summary.save")
+    def flush(self):
+        self.writer.flush()
+
+    def close(self):
+        self.writer.close()
+
+    def _rotate(self):
+        overflow = len(self.conversation_log) - self.max_log_entries
+        if overflow <= 0:
+            return
+        try:
+            with open(self.archive_file, "a", encoding="utf-8") as f:
+                for entry in self.conversation_log[:overflow]:
+                    f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        except OSError as e:
+            print(f"Error archiving conversation log: {e}")
+            return
+        del self.conversation_log[:overflow]
 
     def add_to_log(self, speaker, message):
         timestamp = datetime.datetime.now().isoformat()
         entry = {"timestamp": timestamp, "speaker": speaker, "message": message}
-        self.conversation_log.append(entry)
+        with self._log_lock:
+            self.conversation_log.append(entry)
+            self._rotate()
         self.save_summary()
 
-    def generate_summary(self, conversation_list):
+    def generate_summary(self, conversation_list, log=True):
         conversation_text = "\n".join(conversation_list)
         prompt = (
             "Summarize the following conversation from your perspective as an advanced AI assistant, "
             "highlighting key insights and points:\n\n"
             f"{conversation_text}\n\nSummary:"
         )
-        response = ollama.chat(
-            model="llama3.2",
-            messages=[{"role": "user", "content": prompt}]
-        )
+        with metrics.timer("summary.llm"):
+            response = ollama.chat(
+                model="llama3.2",
+                messages=[{"role": "user", "content": prompt}]
+            )
         summary_text = response["message"]["content"]
-        self.add_to_log("SUMMARY", summary_text)
+        if log:
+            self.add_to_log("SUMMARY", summary_text)
         return summary_text
 
+    def load_chunk_cache(self):
+        if not os.path.exists(self.chunk_cache_file):
+            return
+        try:
+            with open(self.chunk_cache_file, "r") as f:
+                self.chunk_cache = OrderedDict(json.load(f))
+        except Exception as e:
+            print(f"Error loading summary chunk cache: {e}")
+
+    def save_chunk_cache(self):
+        with self._cache_lock:
+            data = list(self.chunk_cache.items())
+        try:
+            atomic_write_json(self.chunk_cache_file, data)
+        except OSError as e:
+            print(f"Error saving summary chunk cache: {e}")
+
+    def chunk_documents(self, documents):
+        """Greedily pack documents into chunks of at most ``chunk_tokens`` tokens, splitting oversized ones."""
+        chunks, current, current_tokens = [], [], 0
+        for document in documents:
+            # Tokenize each document once and slice oversized ones on token boundaries.
+            spans = token_spans(document)
+            if len(spans) > self.chunk_tokens:
+                pieces = []
+                for start in range(0, len(spans), self.chunk_tokens):
+                    window = spans[start:start + self.chunk_tokens]
+                    pieces.append((document[window[0][0]:window[-1][1]], len(window)))
+            else:
+                pieces = [(document, len(spans))]
+            for piece, piece_tokens in pieces:
+                if current and current_tokens + piece_tokens > self.chunk_tokens:
+                    chunks.append("\n".join(current))
+                    current, current_tokens = [], 0
+                current.append(piece)
+                current_tokens += piece_tokens
+        if current:
+            chunks.append("\n".join(current))
+        return chunks
+
+    def summarize_chunk(self, chunk_text):
+        key = hashlib.sha256(chunk_text.encode("utf-8")).hexdigest()
+        with self._cache_lock:
+            if key in self.chunk_cache:
+                self.chunk_cache.move_to_end(key)
+                return self.chunk_cache[key]
+        summary_text = self.generate_summary([chunk_text], log=False)
+        with self._cache_lock:
+            self.chunk_cache[key] = summary_text
+            while len(self.chunk_cache) > self.max_cached_chunks:
+                self.chunk_cache.popitem(last=False)
+        return summary_text
+
+    def summarize_documents(self, documents, max_depth=6):
+        """Map-reduce summary of ``documents`` that never sends more than one chunk per prompt.
+
+        Chunks are summarized in parallel by a bounded pool against the local ollama
+        server, then the chunk summaries are reduced the same way until they fit in
+        a single prompt. Chunk summaries are cached by content hash, so unchanged
+        chunks cost nothing on the next compaction.
+        """
+        chunks = self.chunk_documents(documents)
+        if len(chunks) <= 1 or max_depth <= 0:
+            return self.generate_summary(chunks or documents)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            chunk_summaries = list(pool.map(self.summarize_chunk, chunks))
+        self.save_chunk_cache()
+        return self.summarize_documents(chunk_summaries, max_depth=max_depth - 1)
+
 if __name__ == "__main__":
     cs = ConversationSummary()
     print(cs.generate_summary(["Hello", "How are you?"]))
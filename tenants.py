@@ -0,0 +1,163 @@
+import os
+import re
+import shutil
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+import chromadb
+from embeddings import EmbeddingCache
+from memory_manager import EONMemoryManager, resolve_chroma_path
+
+DEFAULT_TENANT = "default"
+EPHEMERAL_MARKER = ".ephemeral"
+
+
+def tenant_key(tenant_id):
+    """Filesystem- and Chroma-safe name for a tenant id; a hash suffix keeps distinct ids distinct."""
+    slug = re.sub(r"[^A-Za-z0-9_-]", "-", tenant_id).strip("-_")[:48]
+    if slug != tenant_id or not slug:
+        slug = f"{slug}-{hashlib.sha256(tenant_id.encode('utf-8')).hexdigest()[:8]}".lstrip("-")
+    return slug
+
+
+class TenantMemoryPool:
+    """One EONMemoryManager per tenant, each with its own collection, files and token budget.
+
+    Retrieval, writes and summarization only ever touch the calling tenant's
+    partition. All tenants share the Chroma client and the embedding cache.
+    Managers idle for ``idle_ttl`` seconds, or beyond the ``max_tenants`` most
+    recently used, are closed and dropped from memory; their data stays on disk
+    and is reloaded on next use. The ``default`` tenant is the original shared
+    store, so existing data remains reachable.
+
+    Tenants opened with ``ephemeral=True`` are scratch workspaces: their
+    directory is tagged with a marker file, and when they are evicted or the
+    pool closes, their collection and files are deleted instead of kept.
+    """
+
+    def __init__(self, base_dir="adaptive_memory/tenants", chroma_client=None, embedder=None,
+                 token_limit=2000, max_tenants=64, idle_ttl=1800,
+                 default_db_path="adaptive_memory/eon_memory.json", chroma_path=None, hnsw=None):
+        self.base_dir = base_dir
+        if chroma_client is None:
+            chroma_client = chromadb.PersistentClient(path=resolve_chroma_path(chroma_path))
+        self.chroma_client = chroma_client
+        self._owns_embedder = embedder is None
+        if embedder is None:
+            embedder = EmbeddingCache(os.path.join(base_dir, "embedding_cache.sqlite3"))
+        self.embedder = embedder
+        self.token_limit = token_limit
+        self.max_tenants = max_tenants
+        self.idle_ttl = idle_ttl
+        self.default_db_path = default_db_path
+        self.hnsw = hnsw
+        self.managers = OrderedDict()
+        self.last_used = {}
+        self.ephemeral = set()
+        self._lock = threading.Lock()
+
+    def _tenant_dir(self, tenant_id):
+        return os.path.join(self.base_dir, tenant_key(tenant_id))
+
+    def _create(self, tenant_id, ephemeral=False):
+        if tenant_id == DEFAULT_TENANT:
+            return EONMemoryManager(db_path=self.default_db_path, chroma_client=self.chroma_client, embedder=self.embedder,
+                                    hnsw=self.hnsw)
+        key = tenant_key(tenant_id)
+        tenant_dir = self._tenant_dir(tenant_id)
+        marker = os.path.join(tenant_dir, EPHEMERAL_MARKER)
+        if ephemeral and not os.path.exists(marker):
+            os.makedirs(tenant_dir, exist_ok=True)
+            open(marker, "w").close()
+        if os.path.exists(marker):
+            self.ephemeral.add(tenant_id)
+        return EONMemoryManager(
+            db_path=os.path.join(tenant_dir, "eon_memory.json"),
+            token_limit=self.token_limit,
+            chroma_client=self.chroma_client,
+            embedder=self.embedder,
+            collection_name=f"EON_{key}",
+            summary_file=os.path.join(tenant_dir, "conversation_summary.json"),
+            hnsw=self.hnsw,
+        )
+
+    def get(self, tenant_id=DEFAULT_TENANT, ephemeral=False):
+        """Manager for ``tenant_id``; ``ephemeral`` only matters the first time a tenant's store is created."""
+        if tenant_id == DEFAULT_TENANT:
+            ephemeral = False
+        with self._lock:
+            manager = self.managers.get(tenant_id)
+            if manager is None:
+                manager = self._create(tenant_id, ephemeral)
+                self.managers[tenant_id] = manager
+            self.managers.move_to_end(tenant_id)
+            self.last_used[tenant_id] = time.monotonic()
+            evicted = self._pop_evictable(keep=tenant_id)
+        for evicted_id, manager_to_close in evicted:
+            self._close(manager_to_close)
+            self._discard(evicted_id)
+        return manager
+
+    def _pop_evictable(self, keep=None):
+        now = time.monotonic()
+        evicted = []
+        for tenant_id in list(self.managers):
+            idle = now - self.last_used.get(tenant_id, now) > self.idle_ttl
+            over_capacity = len(self.managers) > self.max_tenants
+            if tenant_id != keep and (idle or over_capacity):
+                evicted.append((tenant_id, self.managers.pop(tenant_id)))
+                self.last_used.pop(tenant_id, None)
+        return evicted
+
+    @staticmethod
+    def _close(manager):
+        try:
+            manager.close()
+        except Exception as e:
+            print(f"Error closing tenant memory: {e}")
+
+    def _discard(self, tenant_id):
+        """Delete an ephemeral tenant's collection and files once its manager is closed."""
+        if tenant_id not in self.ephemeral:
+            return
+        with self._lock:
+            if tenant_id in self.managers:
+                return  # reopened in the meantime
+            self.ephemeral.discard(tenant_id)
+        try:
+            self.chroma_client.delete_collection(f"EON_{tenant_key(tenant_id)}")
+        except Exception as e:
+            print(f"Error deleting collection for tenant {tenant_id}: {e}")
+        shutil.rmtree(self._tenant_dir(tenant_id), ignore_errors=True)
+
+    def evict_idle(self):
+        with self._lock:
+            evicted = self._pop_evictable()
+        for tenant_id, manager in evicted:
+            self._close(manager)
+            self._discard(tenant_id)
+        return len(evicted)
+
+    def reload(self, tenant_id=DEFAULT_TENANT):
+        """Close one tenant's manager so the next ``get`` reloads it from disk; other tenants are untouched."""
+        with self._lock:
+            manager = self.managers.pop(tenant_id, None)
+            self.last_used.pop(tenant_id, None)
+        if manager is not None:
+            self._close(manager)
+
+    def active_tenants(self):
+        with self._lock:
+            return list(self.managers)
+
+    def close(self):
+        with self._lock:
+            managers = list(self.managers.items())
+            self.managers.clear()
+            self.last_used.clear()
+        for tenant_id, manager in managers:
+            self._close(manager)
+            self._discard(tenant_id)
+        if self._owns_embedder:
+            self.embedder.close()
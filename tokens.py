@@ -0,0 +1,47 @@
+import os
+import re
+import threading
+
+_tokenizer = None
+_tokenizer_name = None
+_lock = threading.Lock()
+
+
+def get_tokenizer():
+    """Return the tokenizer named by ``EON_TOKENIZER``, or None to fall back to whitespace splitting.
+
+    ``EON_TOKENIZER`` may be a path to a ``tokenizer.json`` or a Hugging Face repo id
+    (e.g. one matching llama3.2); it is loaded once with the optional ``tokenizers`` package.
+    """
+    global _tokenizer, _tokenizer_name
+    name = os.environ.get("EON_TOKENIZER")
+    if not name:
+        return None
+    with _lock:
+        if _tokenizer_name != name:
+            _tokenizer_name = name
+            _tokenizer = None
+            try:
+                from tokenizers import Tokenizer
+                if os.path.exists(name):
+                    _tokenizer = Tokenizer.from_file(name)
+                else:
+                    _tokenizer = Tokenizer.from_pretrained(name)
+            except Exception as e:
+                print(f"Error loading tokenizer {name}, falling back to word counts: {e}")
+        return _tokenizer
+
+
+def token_spans(text):
+    """Character ``(start, end)`` offsets of each token in ``text``, counted the same way as ``count_tokens``."""
+    tokenizer = get_tokenizer()
+    if tokenizer is None:
+        return [match.span() for match in re.finditer(r"\S+", text)]
+    return tokenizer.encode(text, add_special_tokens=False).offsets
+
+
+def count_tokens(text):
+    tokenizer = get_tokenizer()
+    if tokenizer is None:
+        return len(text.split())
+    return len(tokenizer.encode(text, add_special_tokens=False).ids)